@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework.response import Response
+
+from .conditional import ConditionalRetrieveMixin
+
+
+class CachedRetrieveMixin(ConditionalRetrieveMixin):
+    '''
+    Serve retrieved objects from a read-through cache of their
+    serialized representations.
+
+    Entries are kept under the cache key of the object, in the cache
+    named by the SHREWD_CACHE_ALIAS setting, and are forgotten by shrewd
+    models with `cache_responses` set whenever they are saved or deleted.
+    Each entry is stamped with the etag of the object's validators, so
+    it is never served once any of them has moved on.
+
+    Only a single, narrow query for the validators is made on a hit.
+    Object permissions are not checked, so this is only meant for
+    views whose objects may be seen by anyone allowed into them.
+    '''
+    def get_response_cache(self):
+        return caches[getattr(settings, 'SHREWD_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        queryset = self.filter_queryset(self.get_queryset())
+
+        try:
+            validators = queryset.filter(**lookup).values_list(
+                'pk', *self.validator_fields
+            ).first()
+        except (TypeError, ValueError, ValidationError):
+            # as `get_object_or_404` does for lookups of the wrong type
+            raise Http404
+        if validators is None:
+            raise Http404
+        pk, validators = validators[0], validators[1:]
+
+        headers, response = self.check_conditions(request, validators)
+        if response is not None:
+            return response
+
+        cache = self.get_response_cache()
+        key = queryset.model.get_cache_key(pk)
+        etag = headers['ETag']
+        entry = cache.get(key)
+        if entry is None or entry[0] != etag:
+            entry = (etag, self.get_serializer(self.get_object()).data)
+            cache.set(key, entry)
+        return Response(entry[1], headers=headers)
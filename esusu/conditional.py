@@ -0,0 +1,147 @@
+from hashlib import md5
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalMixin:
+    '''
+    Answer conditional GET requests with a 304,
+    before any serializer gets to run.
+
+    Validators are read off the `validator_fields` of the retrieved
+    object, or of the objects on the listed page (the latest of each
+    field, along with their pks and the links off the page). Unpaginated
+    listings have them aggregated over the queryset in a single query.
+    The latest of them is sent as Last-Modified, and a hash of them as ETag.
+    '''
+    validator_fields = ('updated_at',)
+
+    def get_object_validators(self, obj):
+        '''
+        return the values of the validator fields on the passed object,
+        following relations through the objects they point at.
+        '''
+        validators = []
+        for field in self.validator_fields:
+            value = obj
+            for name in field.split('__'):
+                value = getattr(value, name)
+            validators.append(value)
+        return tuple(validators)
+
+    def get_list_validators(self, queryset):
+        '''
+        return the latest value of each validator field
+        over the passed queryset, and its count.
+        '''
+        aggregates = queryset.order_by().aggregate(
+            *[Max(field) for field in self.validator_fields],
+            count=Count('pk')
+        )
+        return tuple(
+            aggregates['{}__max'.format(field)] for field in self.validator_fields
+        ) + (aggregates['count'],)
+
+    def get_page_validators(self, page):
+        '''
+        return the latest value of each validator field over the objects
+        on the passed page, their pks, and the links off the page.
+        '''
+        values = [self.get_object_validators(obj) for obj in page]
+        latest = tuple(
+            max((value[i] for value in values if value[i] is not None), default=None)
+            for i in range(len(self.validator_fields))
+        )
+        links = (self.paginator.get_next_link(), self.paginator.get_previous_link())
+        return latest + (tuple(obj.pk for obj in page), links)
+
+    def get_etag(self, request, validators):
+        '''
+        return an etag for the representation with the
+        passed validators, as served at the requested url.
+        '''
+        stamp = repr((validators, request.build_absolute_uri()))
+        return quote_etag(md5(stamp.encode()).hexdigest())
+
+    def get_last_modified(self, validators):
+        timestamps = [
+            value.timestamp() for value in validators if hasattr(value, 'timestamp')
+        ]
+        return int(max(timestamps)) if timestamps else None
+
+    def get_validator_headers(self, etag, last_modified):
+        headers = {'ETag': etag}
+        if last_modified is not None:
+            headers['Last-Modified'] = http_date(last_modified)
+        return headers
+
+    def check_conditions(self, request, validators):
+        '''
+        return the validator headers for the passed validators, along with
+        the response the request's conditions call for, if any.
+        '''
+        etag = self.get_etag(request, validators)
+        last_modified = self.get_last_modified(validators)
+        headers = self.get_validator_headers(etag, last_modified)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            for header, value in headers.items():
+                response[header] = value
+        return headers, response
+
+
+class ConditionalListMixin(ConditionalMixin):
+    '''
+    Answer conditional list requests with a 304.
+
+    Paginated listings are validated off the page served, which is
+    fetched anyway, so revalidating a page costs no more than serving
+    it however large the listed table grows.
+    '''
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            validators = self.get_list_validators(queryset)
+        else:
+            validators = self.get_page_validators(page)
+        headers, response = self.check_conditions(request, validators)
+        if response is not None:
+            return response
+
+        if page is None:
+            response = Response(self.get_serializer(queryset, many=True).data)
+        else:
+            response = self.get_paginated_response(
+                self.get_serializer(page, many=True).data
+            )
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+
+class ConditionalRetrieveMixin(ConditionalMixin):
+    '''
+    Answer conditional retrieve requests with a 304.
+    '''
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        validators = self.get_object_validators(instance)
+        headers, response = self.check_conditions(request, validators)
+        if response is not None:
+            return response
+
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers=headers)
+
+
+class ConditionalGetMixin(ConditionalListMixin, ConditionalRetrieveMixin):
+    '''
+    Answer conditional list and retrieve requests with a 304.
+    '''
@@ -0,0 +1,17 @@
+from rest_framework import pagination
+
+
+class CursorPagination(pagination.CursorPagination):
+    '''
+    Cursor pagination keyed on the default ordering of the paginated model.
+
+    Pages are fetched with a range predicate on the ordering fields,
+    rather than with an offset, so fetching a page costs the same
+    no matter how deep into the listing it is.
+    '''
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(queryset.model._meta.ordering)
@@ -93,6 +93,46 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/2.2/ref/settings/#caches
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # serialized api responses, forgotten whenever their objects are saved
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+    },
+    # the groups users are members of, forgotten by whichever process
+    # writes their watches or subscriptions; so in production this has to
+    # be a cache shared by all processes (memcached, redis, a database
+    # cache), as a local-memory cache is only ever forgotten in one
+    'memberships': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'memberships',
+    },
+}
+
+SHREWD_CACHE_ALIAS = 'responses'
+MEMBERSHIP_CACHE_ALIAS = 'memberships'
+
+# days that soft-deleted objects of shrewd models are kept for, before
+# they are purged, by model label ('*' for the models not listed)
+SHREWD_RETENTION_DAYS = {
+    '*': 90,
+}
+
+# where the rate limits of payment providers are kept, so that they hold
+# across all workers; without it each worker process holds them on its own.
+# e.g. {'BACKEND': 'dramatiq.rate_limits.backends.RedisBackend', 'OPTIONS': {'url': ...}}
+PAYMENTS_RATE_LIMIT_BACKEND = None
+
+# where the contributions of dissolved tenures are archived
+CONTRIBUTION_ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive', 'contributions')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -139,6 +179,18 @@ if TESTING:
     PASSWORD_HASHERS = [
         'django.contrib.auth.hashers.MD5PasswordHasher',
     ]
+    # test databases are rebuilt for every test, but caches are not
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+        'responses': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+        'memberships': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        },
+    }
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
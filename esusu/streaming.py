@@ -0,0 +1,97 @@
+import csv
+import json
+
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+# objects fetched from the database, and serialized, at a time
+STREAM_CHUNK_SIZE = 500
+
+
+def iter_serialized(queryset, serializer_class, context, chunk_size=STREAM_CHUNK_SIZE):
+    '''
+    Yield the serialized objects of the passed queryset,
+    fetching and serializing a chunk of them at a time.
+    '''
+    chunk = []
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            yield from serializer_class(chunk, many=True, context=context).data
+            chunk = []
+    if chunk:
+        yield from serializer_class(chunk, many=True, context=context).data
+
+
+def render_json(rows):
+    '''
+    Yield the passed rows as the pieces of a single json array.
+    '''
+    yield '['
+    for i, row in enumerate(rows):
+        yield (',' if i else '') + json.dumps(row, cls=JSONEncoder)
+    yield ']'
+
+
+def render_ndjson(rows):
+    '''
+    Yield the passed rows as lines of newline delimited json.
+    '''
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder) + '\n'
+
+
+class _Echo:
+    '''
+    File-like object handing back whatever is written to it.
+    '''
+    def write(self, value):
+        return value
+
+
+def render_csv(rows):
+    '''
+    Yield the passed rows as lines of csv, headed by the keys of the first.
+    '''
+    writer = None
+    for row in rows:
+        if writer is None:
+            writer = csv.DictWriter(_Echo(), fieldnames=list(row))
+            yield writer.writeheader()
+        yield writer.writerow(row)
+
+
+STREAM_FORMATS = {
+    'json': (render_json, 'application/json'),
+    'ndjson': (render_ndjson, 'application/x-ndjson'),
+    'csv': (render_csv, 'text/csv'),
+}
+
+
+def get_stream_format(request, default=None):
+    '''
+    Return the format the passed request asks to have its listing
+    streamed in (`?stream=1`, or `?stream=` json, ndjson or csv),
+    or the passed default if it doesn't ask for a stream.
+    '''
+    stream = request.query_params.get('stream', '').lower()
+    if stream in ('1', 'true'):
+        return 'json'
+    if stream in STREAM_FORMATS:
+        return stream
+    return default
+
+
+def make_streaming_response(rows, stream_format, filename=None):
+    '''
+    Return a response which streams the passed rows in the passed format,
+    as an attachment if given the name to save it under.
+    '''
+    render, content_type = STREAM_FORMATS[stream_format]
+    response = StreamingHttpResponse(render(rows), content_type=content_type)
+    if filename is not None:
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(
+            filename, stream_format
+        )
+    return response
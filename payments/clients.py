@@ -0,0 +1,222 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from dramatiq.rate_limits import BucketRateLimiter
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from .utils import Alert, AlertStatus
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    '''
+    I let at most `rate` calls through per second, on average,
+    across all the threads that call me, bursting up to `rate` calls.
+
+    I only know of the calls made in my own process, so where calls are
+    made from many processes, each of them should be given its share
+    of the provider's limit, or a `SharedRateLimiter` be used instead.
+    '''
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        '''
+        block until a call may go through.
+        '''
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.rate, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedRateLimiter:
+    '''
+    I let at most `rate` calls through per second across all the
+    processes (and nodes) whose limiters share my key, counting calls
+    in one-second buckets kept on a dramatiq rate limit backend
+    (Redis or Memcached).
+    '''
+    def __init__(self, backend, key, rate):
+        self.limiter = BucketRateLimiter(backend, key, limit=max(int(rate), 1), bucket=1000)
+
+    def try_acquire(self):
+        with self.limiter.acquire(raise_on_failure=False) as acquired:
+            return acquired
+
+    def acquire(self):
+        '''
+        block until a call may go through.
+        '''
+        while not self.try_acquire():
+            # until the next bucket
+            time.sleep(1 - time.time() % 1)
+
+
+class ProcessorClient:
+    '''
+    I charge and credit the cards of processors, with their providers.
+
+    Batches of charges or credits are sent to providers concurrently,
+    by up to `max_workers` threads, while calls to each provider (keyed
+    on the card type of the processors) are held to its rate limit.
+    The limits are shared by all processes when the
+    PAYMENTS_RATE_LIMIT_BACKEND setting is set, and only hold per
+    process otherwise. Subclasses do the actual talking to providers
+    in `send`.
+    '''
+    def __init__(self, max_workers=1, rate_limits=None):
+        self.max_workers = max_workers
+        backend = get_rate_limit_backend()
+        self.rate_limiters = {
+            card_type: (
+                RateLimiter(rate) if backend is None
+                else SharedRateLimiter(backend, RATE_LIMIT_KEY.format(card_type), rate)
+            )
+            for card_type, rate in (rate_limits or {}).items()
+        }
+
+    def send(self, processor, amount, alert_type):
+        '''
+        return whether the provider of the argument processor
+        carried out the charge or credit of the argument amount.
+        '''
+        raise NotImplementedError
+
+    def _process(self, processor, amount, make_alert, alert_type):
+        '''
+        Send the charge or credit to the provider, and alert its outcome.
+
+        A charge or credit the provider could not be heard back from (over
+        a broken connection, or past a timeout) may still have gone through,
+        so its outcome is unknown rather than failed. Anything else going
+        wrong is a bug or a misconfiguration, and is left to be raised.
+        '''
+        rate_limiter = self.rate_limiters.get(processor.card_type)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        try:
+            alert_status = (
+                AlertStatus.SUCCESS if self.send(processor, amount, alert_type)
+                else AlertStatus.FAILURE
+            )
+        except requests.RequestException:
+            logger.warning(
+                'Outcome of %s of %s on processor %s is unknown',
+                alert_type, amount, processor.pk, exc_info=True
+            )
+            alert_status = AlertStatus.UNKNOWN
+        return make_alert(processor.user_id, amount, alert_status=alert_status)
+
+    def charge(self, processor, amount):
+        return self._process(processor, amount, Alert.make_charge_alert, 'charge')
+
+    def credit(self, processor, amount):
+        return self._process(processor, amount, Alert.make_credit_alert, 'credit')
+
+    def process_many(self, transactions, process):
+        '''
+        Apply the argument process (`charge` or `credit`) to each
+        (processor, amount) pair in the argument iterable, and return
+        the resulting alerts in the same order.
+        '''
+        transactions = list(transactions)
+        if self.max_workers <= 1 or len(transactions) <= 1:
+            return [process(processor, amount) for processor, amount in transactions]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda t: process(*t), transactions))
+
+
+class DummyProcessorClient(ProcessorClient):
+    '''
+    I pretend every charge and credit goes through, without calling anyone.
+    '''
+    def send(self, processor, amount, alert_type):
+        return True
+
+
+class HTTPProcessorClient(ProcessorClient):
+    '''
+    I charge and credit cards by posting them to the endpoints of their
+    providers, found under the base url for their card type, over a
+    single session whose connections are pooled per provider host.
+    '''
+    def __init__(self, base_urls, timeout=10, **kwargs):
+        super().__init__(**kwargs)
+        self.base_urls = base_urls
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=len(base_urls) or 1,
+            pool_maxsize=max(self.max_workers, 1)
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def send(self, processor, amount, alert_type):
+        response = self.session.post(
+            '{}/{}s'.format(self.base_urls[processor.card_type].rstrip('/'), alert_type),
+            json={'card_id': processor.card_id, 'amount': str(amount)},
+            timeout=self.timeout
+        )
+        return response.ok
+
+
+RATE_LIMIT_KEY = 'payments:rate-limit:{}'
+
+_client = None
+_rate_limit_backend = None
+
+def get_rate_limit_backend():
+    '''
+    Return the dramatiq rate limit backend configured by the
+    PAYMENTS_RATE_LIMIT_BACKEND setting (the dotted path to its `BACKEND`,
+    and its `OPTIONS`), or None if there is none.
+    '''
+    global _rate_limit_backend
+    config = getattr(settings, 'PAYMENTS_RATE_LIMIT_BACKEND', None)
+    if _rate_limit_backend is None and config:
+        _rate_limit_backend = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _rate_limit_backend
+
+def get_processor_client():
+    '''
+    Return the processor client configured by the PAYMENTS_PROCESSOR_CLIENT
+    setting (the dotted path to its `BACKEND`, and its `OPTIONS`), or a
+    dummy client if there is none. The client, and its pooled session,
+    is shared by everything in the process.
+    '''
+    global _client
+    if _client is None:
+        config = getattr(settings, 'PAYMENTS_PROCESSOR_CLIENT', {})
+        backend = config.get('BACKEND', 'payments.clients.DummyProcessorClient')
+        _client = import_string(backend)(**config.get('OPTIONS', {}))
+    return _client
+
+@receiver(setting_changed)
+def forget_processor_client(setting, **kwargs):
+    global _client, _rate_limit_backend
+    if setting in ('PAYMENTS_PROCESSOR_CLIENT', 'PAYMENTS_RATE_LIMIT_BACKEND'):
+        _client = None
+    if setting == 'PAYMENTS_RATE_LIMIT_BACKEND':
+        _rate_limit_backend = None
@@ -0,0 +1,18 @@
+# Generated by Django 3.0 on 2026-10-18 02:32
+
+from django.db import migrations
+import shrewd_models.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processor',
+            index=shrewd_models.models.ShrewdIndex(fields=['-created_at'], name='payments_pr_created_e36807_idx'),
+        ),
+    ]
@@ -2,14 +2,15 @@ from django.conf import settings
 from django.db import models
 
 from shrewd_models.models import AbstractShrewdModelMixin
-from .utils import Alert, AlertStatus, AlertType
+from .clients import get_processor_client
 
 
 class Processor(AbstractShrewdModelMixin, models.Model):
     '''
     Model for processing payments.
 
-    Dummy for now.
+    Charges and credits are carried out by the configured processor client
+    (see `payments.clients`), which is a dummy unless configured otherwise.
     '''
     INTERSWITCH = 'Interswitch'
     MASTER_CARD = 'Master Card'
@@ -39,23 +40,15 @@ class Processor(AbstractShrewdModelMixin, models.Model):
 
     def charge(self, amount):
         '''
-        Charge the argument amount on the card.
-
-        For now just return a successful alert.
+        Charge the argument amount on the card, with its provider.
         '''
-        # this is where we'll make an appropriate request to card provider
-        # if the request is successful
-        # we'll probably save the money to our company's escrow
-        # regardless, we'll return an appropriate alert as response
-        return Alert.make_charge_alert(self.user.pk, amount)
+        # if the charge goes through, the money is probably
+        # saved to our company's escrow
+        return get_processor_client().charge(self, amount)
 
     def credit(self, amount):
         '''
-        Credit the argument amount to the card.
-
-        For now just return a successful alert.
+        Credit the argument amount to the card, with its provider.
         '''
-        # this is where we'll make an appropriate request to card provider
-        # we'll probably move the money from our company's escrow
-        # then return an appropriate alert as response
-        return Alert.make_credit_alert(self.user.pk, amount)
+        # the money is probably moved from our company's escrow
+        return get_processor_client().credit(self, amount)
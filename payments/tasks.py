@@ -1,4 +1,6 @@
+from .clients import get_processor_client
 from .models import Processor
+from .utils import Alert, AlertStatus
 
 
 def charge_user(user_pk, amount):
@@ -6,3 +8,52 @@ def charge_user(user_pk, amount):
 
 def credit_user(user_pk, amount):
     return Processor.objects.get(user__id=user_pk).credit(amount)
+
+def get_processors(user_pks):
+    '''
+    Return a dict mapping each of the argument user pks
+    to the user's processor, fetched with a single query.
+    '''
+    return {
+        processor.user_id: processor
+        for processor in Processor.objects.filter(user__id__in=set(user_pks))
+    }
+
+def _process_users(transactions, process, make_alert):
+    transactions = list(transactions)
+    processors = get_processors(user_pk for user_pk, _ in transactions)
+    client = get_processor_client()
+
+    # users without processors fail, the rest are processed concurrently
+    alerts = [
+        make_alert(user_pk, amount, alert_status=AlertStatus.FAILURE)
+        if user_pk not in processors else None
+        for user_pk, amount in transactions
+    ]
+    processed = iter(client.process_many((
+        (processors[user_pk], amount)
+        for user_pk, amount in transactions if user_pk in processors
+    ), getattr(client, process)))
+    return [alert if alert is not None else next(processed) for alert in alerts]
+
+def charge_users(charges):
+    '''
+    Charge each (user_pk, amount) pair in the argument iterable,
+    and return the resulting alerts in the same order.
+
+    The processors of all the users are fetched with a single query, and
+    charged concurrently by the processor client, within provider limits.
+    Users without a processor get a failed charge alert.
+    '''
+    return _process_users(charges, 'charge', Alert.make_charge_alert)
+
+def credit_users(credits):
+    '''
+    Credit each (user_pk, amount) pair in the argument iterable,
+    and return the resulting alerts in the same order.
+
+    The processors of all the users are fetched with a single query, and
+    credited concurrently by the processor client, within provider limits.
+    Users without a processor get a failed credit alert.
+    '''
+    return _process_users(credits, 'credit', Alert.make_credit_alert)
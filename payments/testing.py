@@ -0,0 +1,70 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeProvider:
+    '''
+    I am a card provider, served locally from a thread, for tests.
+
+    I carry out every charge and credit posted to me, except those on
+    the card ids I am told to decline, taking `latency` seconds over
+    each. I keep the requests I get, and the most I handled at once.
+
+        with FakeProvider() as provider:
+            client = HTTPProcessorClient({Processor.VISA: provider.url})
+    '''
+    def __init__(self, declined_card_ids=(), latency=0):
+        self.declined_card_ids = set(declined_card_ids)
+        self.latency = latency
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self.url = 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+    def _make_handler(self):
+        provider = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length) or b'{}')
+                provider.handle(self.path, body)
+                declined = body.get('card_id') in provider.declined_card_ids
+
+                self.send_response(402 if declined else 200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def handle(self, path, body):
+        with self.lock:
+            self.requests.append((path, body))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
@@ -1,9 +1,14 @@
+import time
+from unittest import mock
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from hashids import Hashids
 
+from .clients import HTTPProcessorClient, SharedRateLimiter
 from .models import Processor
-from .tasks import charge_user, credit_user
+from .tasks import charge_user, charge_users, credit_user, credit_users
+from .testing import FakeProvider
 
 
 class TestTasks(TestCase):
@@ -33,3 +38,148 @@ class TestTasks(TestCase):
         self.assertTrue(resp.is_credit())
         self.assertEqual(resp.user_pk, self.mfon.pk)
         self.assertEqual(resp.amount, 50000)
+
+    def test_charge_users(self):
+        alerts = charge_users([(self.mfon.pk, 10000), (self.mfon.pk + 1, 20000)])
+
+        self.assertEqual(len(alerts), 2)
+        self.assertTrue(alerts[0].is_success())
+        self.assertTrue(alerts[0].is_charge())
+        self.assertEqual(alerts[0].amount, 10000)
+        # no processor for the second user
+        self.assertTrue(alerts[1].is_failure())
+        self.assertTrue(alerts[1].is_charge())
+
+    def test_credit_users(self):
+        alerts = credit_users([(self.mfon.pk, 50000), (self.mfon.pk + 1, 20000)])
+
+        self.assertEqual(len(alerts), 2)
+        self.assertTrue(alerts[0].is_success())
+        self.assertTrue(alerts[0].is_credit())
+        self.assertEqual(alerts[0].amount, 50000)
+        self.assertTrue(alerts[1].is_failure())
+        self.assertTrue(alerts[1].is_credit())
+
+
+class HTTPProcessorClientTest(TestCase):
+    '''
+    Test the charging and crediting of cards with their (fake) providers.
+    '''
+    def setUp(self):
+        self.processors = []
+        for i, card_type in enumerate([Processor.VISA] * 6 + [Processor.VERVE] * 2):
+            user = get_user_model().objects.create_user(
+                email=f'user{i}@aol.com', password='iProcess',
+                first_name='User', last_name=str(i)
+            )
+            self.processors.append(Processor.objects.create(
+                user=user, card_type=card_type,
+                card_id=Hashids(min_length=32).encode(user.pk),
+            ))
+
+    def make_client(self, provider, **kwargs):
+        return HTTPProcessorClient(
+            {Processor.VISA: provider.url, Processor.VERVE: provider.url}, **kwargs
+        )
+
+    def test_charge_and_credit(self):
+        declined = self.processors[1]
+        with FakeProvider(declined_card_ids=[declined.card_id]) as provider:
+            client = self.make_client(provider)
+            charged = client.charge(self.processors[0], 5000)
+            failed = client.charge(declined, 5000)
+            credited = client.credit(self.processors[0], 20000)
+
+        self.assertTrue(charged.is_success())
+        self.assertTrue(failed.is_failure())
+        self.assertTrue(credited.is_success())
+        self.assertTrue(credited.is_credit())
+        self.assertEqual(provider.requests[0], (
+            '/charges', {'card_id': self.processors[0].card_id, 'amount': '5000'}
+        ))
+        self.assertEqual(provider.requests[2][0], '/credits')
+
+    def test_outcome_is_unknown_when_provider_cannot_be_heard_back_from(self):
+        provider = FakeProvider()
+        client = self.make_client(provider, timeout=1)
+        provider.server.server_close()
+
+        with self.assertLogs('payments.clients', 'WARNING'):
+            alert = client.charge(self.processors[0], 5000)
+
+        self.assertTrue(alert.is_unknown())
+        self.assertFalse(alert.is_failure())
+
+    def test_misconfiguration_is_not_taken_for_decline(self):
+        client = HTTPProcessorClient({Processor.VERVE: 'http://127.0.0.1:9'})
+
+        with self.assertRaises(KeyError):
+            client.charge(self.processors[0], 5000)
+
+    def test_many_are_processed_concurrently_and_in_order(self):
+        declined = self.processors[3]
+        with FakeProvider(declined_card_ids=[declined.card_id], latency=0.05) as provider:
+            client = self.make_client(provider, max_workers=4)
+            alerts = client.process_many(
+                ((processor, 5000) for processor in self.processors), client.charge
+            )
+
+        self.assertGreater(provider.max_in_flight, 1)
+        self.assertLessEqual(provider.max_in_flight, 4)
+        self.assertEqual(
+            [alert.user_pk for alert in alerts],
+            [processor.user_id for processor in self.processors]
+        )
+        self.assertEqual(
+            [alert.is_success() for alert in alerts],
+            [processor != declined for processor in self.processors]
+        )
+
+    def test_calls_to_provider_are_rate_limited_by_card_type(self):
+        with FakeProvider() as provider:
+            # bursts of up to 4 visa calls, and 4 more a second after that
+            client = self.make_client(
+                provider, max_workers=8, rate_limits={Processor.VISA: 4}
+            )
+            started = time.monotonic()
+            client.process_many(
+                ((processor, 5000) for processor in self.processors), client.charge
+            )
+            elapsed = time.monotonic() - started
+
+        # the last 2 of the 6 visa calls waited on the limit
+        self.assertGreaterEqual(elapsed, 0.45)
+        self.assertEqual(len(provider.requests), 8)
+
+    @override_settings(PAYMENTS_RATE_LIMIT_BACKEND={
+        'BACKEND': 'dramatiq.rate_limits.backends.StubBackend',
+    })
+    def test_rate_limits_are_shared_by_clients_on_a_backend(self):
+        # one client per worker process, within the same second
+        clients = [
+            HTTPProcessorClient({Processor.VISA: 'http://provider'}, rate_limits={Processor.VISA: 4})
+            for _ in range(2)
+        ]
+        limiters = [client.rate_limiters[Processor.VISA] for client in clients]
+        self.assertIsInstance(limiters[0], SharedRateLimiter)
+
+        with mock.patch('time.time', return_value=1000.5):
+            acquired = [limiters[i % 2].try_acquire() for i in range(6)]
+
+        self.assertEqual(acquired, [True] * 4 + [False] * 2)
+
+    def test_users_are_charged_with_configured_client(self):
+        with FakeProvider() as provider:
+            with override_settings(PAYMENTS_PROCESSOR_CLIENT={
+                'BACKEND': 'payments.clients.HTTPProcessorClient',
+                'OPTIONS': {
+                    'base_urls': {Processor.VISA: provider.url, Processor.VERVE: provider.url},
+                    'max_workers': 4,
+                },
+            }):
+                alerts = charge_users(
+                    (processor.user_id, 5000) for processor in self.processors
+                )
+
+        self.assertTrue(all(alert.is_success() for alert in alerts))
+        self.assertEqual(len(provider.requests), 8)
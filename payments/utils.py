@@ -17,12 +17,17 @@ class AlertType(Enum):
 class AlertStatus(Enum):
     FAILURE = auto()
     SUCCESS = auto()
+    # the provider could not be heard back from, so the money may have moved
+    UNKNOWN = auto()
 
     def is_success(self):
-        return self.name is 'SUCCESS'
+        return self is AlertStatus.SUCCESS
 
     def is_failure(self):
-        return not self.is_sucess()
+        return self is AlertStatus.FAILURE
+
+    def is_unknown(self):
+        return self is AlertStatus.UNKNOWN
 
 
 class Alert:
@@ -61,3 +66,6 @@ class Alert:
 
     def is_failure(self):
         return self.alert_status.is_failure()
+
+    def is_unknown(self):
+        return self.alert_status.is_unknown()
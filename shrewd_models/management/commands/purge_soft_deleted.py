@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from shrewd_models import tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Hard delete the objects of shrewd models which have been soft '
+        'deleted for longer than their retention (SHREWD_RETENTION_DAYS).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label.ModelName',
+            help='Only purge the shrewd models with these labels.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=tasks.PURGE_BATCH_SIZE,
+            help='The number of objects to delete per transaction.'
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0, metavar='SECONDS',
+            help='Pause this many seconds between batches, to go easy on the database.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        purged, held = tasks.purge_soft_deleted(
+            labels=options['labels'],
+            batch_size=options['batch_size'], pause=options['pause']
+        )
+        for label in sorted(set(purged) | set(held)):
+            self.stdout.write(
+                f'{label}: purged {purged.get(label, 0)}, held back {held.get(label, 0)}'
+            )
+        self.stdout.write(
+            f'Purged {sum(purged.values())} object(s) '
+            f'in {time.monotonic() - started:.2f}s.'
+        )
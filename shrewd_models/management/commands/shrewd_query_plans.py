@@ -0,0 +1,33 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from shrewd_models.models import AbstractShrewdModel
+
+
+class Command(BaseCommand):
+    help = (
+        'Show the query plan and timing of the default (shrewd) listing '
+        'of every shrewd model, next to those of its non-shrewd listing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=100,
+            help='The number of objects to fetch when timing each listing.'
+        )
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if not issubclass(model, AbstractShrewdModel):
+                continue
+            self.stdout.write(self.style.MIGRATE_HEADING(model._meta.label))
+            for manager_name in ['objects', 'all_objects']:
+                qs = getattr(model, manager_name).all()
+                started = time.perf_counter()
+                list(qs[:options['limit']])
+                elapsed = (time.perf_counter() - started) * 1000
+                self.stdout.write(f'  {manager_name} ({elapsed:.2f}ms):')
+                for line in qs.explain().splitlines():
+                    self.stdout.write(f'    {line}')
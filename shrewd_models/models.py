@@ -1,7 +1,14 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 
 
+# the objects a shrewd manager fetches in its default, shrewd mode
+SHREWD_CONDITION = Q(deleted_at__isnull=True, activated_at__isnull=False)
+
+
 class ShrewdModelManager(models.Manager):
     '''
     I manage shrewd models.
@@ -19,9 +26,37 @@ class ShrewdModelManager(models.Manager):
     def get_queryset(self):
         if not self.is_shrewd:
             return ShrewedQuerySet(self.model)
-        return ShrewedQuerySet(self.model).filter(
-            deleted_at__isnull=True, activated_at__isnull=False
+        return ShrewedQuerySet(self.model).filter(SHREWD_CONDITION)
+
+    def iter_batches(self, *args, **kwargs):
+        return self.get_queryset().iter_batches(*args, **kwargs)
+
+    def iter_pk_ranges(self, *args, **kwargs):
+        return self.get_queryset().iter_pk_ranges(*args, **kwargs)
+
+
+class ShrewdIndex(models.Index):
+    '''
+    I index the objects of a shrewd model on the given fields, but I only
+    care about the ones a shrewd manager would fetch in its shrewd mode.
+
+    On database backends that support partial indexes, I leave deleted
+    and deactivated objects out of the index altogether. On the others
+    I tack `deleted_at` and `activated_at` onto the given fields, so that
+    the shrewd filter can still be checked off the index.
+    '''
+    def create_sql(self, model, schema_editor, using='', **kwargs):
+        if schema_editor.connection.features.supports_partial_indexes:
+            index = models.Index(
+                fields=self.fields, name=self.name,
+                db_tablespace=self.db_tablespace, condition=SHREWD_CONDITION
+            )
+        else:
+            index = models.Index(
+                fields=self.fields + ['deleted_at', 'activated_at'],
+                name=self.name, db_tablespace=self.db_tablespace
             )
+        return index.create_sql(model, schema_editor, using=using, **kwargs)
 
 
 class AbstractShrewdModel(models.Model):
@@ -38,9 +73,14 @@ class AbstractShrewdModel(models.Model):
     keep myself out of your way. I'll go into my (safe) deleted state.
     You'll know where to find me when you realise the errors of 
     your ways and feel sorry.
+
+    Since I'm mostly fetched shrewdly and newest first, I come indexed
+    that way. Subclasses whose Meta extends mine keep that index, and
+    should add shrewd indexes of their own for their hot lookups.
     '''
     class Meta:
         abstract = True
+        indexes = [ShrewdIndex(fields=['-created_at'])]
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -50,9 +90,37 @@ class AbstractShrewdModel(models.Model):
     objects = ShrewdModelManager()  # shrewd_mode=True
     all_objects = ShrewdModelManager(shrewd_mode=False)
 
+    # whether representations of my instances are cached (see
+    # `esusu.caching.CachedRetrieveMixin`), and so must be forgotten
+    # whenever they are written to
+    cache_responses = False
+
+    @classmethod
+    def get_cache_key(cls, pk):
+        '''
+        return the key under which representations of my instance
+        with the passed pk are cached.
+        '''
+        return 'shrewd:{}:{}'.format(cls._meta.label_lower, pk)
+
+    def forget_cached(self):
+        '''
+        drop any cached representation of me, from the cache
+        named by the SHREWD_CACHE_ALIAS setting, if I am cached at all.
+        '''
+        if not self.cache_responses:
+            return
+        alias = getattr(settings, 'SHREWD_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)
+        caches[alias].delete(self.get_cache_key(self.pk))
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.forget_cached()
+
     def delete(self, hard=False, **kwargs):
         if hard:
             # go into nothingness
+            self.forget_cached()
             super().delete()
             return
         # deactivate, and go into (safe) deleted state
@@ -75,10 +143,71 @@ class ShrewedQuerySet(models.QuerySet):
         if hard:
             # send them all into nothingness
             return super().delete()
-        return super().update(deleted_at=timezone.now(), activated_at=None)
+        now = timezone.now()
+        return super().update(deleted_at=now, activated_at=None, updated_at=now)
 
     def undelete(self):
-        return super().update(deleted_at=None, activated_at=timezone.now())
+        now = timezone.now()
+        return super().update(deleted_at=None, activated_at=now, updated_at=now)
+
+    def iter_batches(self, size, order_by='pk'):
+        '''
+        Yield lists of up to `size` of my objects, walking me in the order
+        of the passed (non-null) field, ties broken by pk, with a range
+        predicate on the last object seen rather than with offsets. So
+        each batch is read off an index on the field in a single query,
+        no matter how far into me it is.
+
+        Objects that stop matching me while I am being walked are not
+        revisited, so the objects of a batch may be updated or deleted
+        before the next is asked for.
+        '''
+        descending = order_by.startswith('-')
+        name = order_by.lstrip('-')
+        lookup = 'lt' if descending else 'gt'
+        if name == 'pk':
+            qs = self.order_by(order_by)
+            attname = 'pk'
+        else:
+            qs = self.order_by(order_by, '-pk' if descending else 'pk')
+            attname = self.model._meta.get_field(name).attname
+
+        last = None
+        while True:
+            batch_qs = qs
+            if last is not None:
+                after = Q(**{'pk__' + lookup: last.pk})
+                if name != 'pk':
+                    value = getattr(last, attname)
+                    after = Q(**{name + '__' + lookup: value}) | Q(after, **{name: value})
+                batch_qs = qs.filter(after)
+            batch = list(batch_qs[:size])
+            if batch:
+                yield batch
+            if len(batch) < size:
+                return
+            last = batch[-1]
+
+    def iter_pk_ranges(self, size):
+        '''
+        Yield (first pk, last pk) pairs spanning consecutive runs of up to
+        `size` of my objects in pk order, read off a single server-side
+        cursor over my pks (where the database has them).
+
+        The objects of a run are those of me with pks in its range.
+        '''
+        first = last = None
+        count = 0
+        for pk in self.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=size):
+            if not count:
+                first = pk
+            last = pk
+            count += 1
+            if count == size:
+                yield first, last
+                count = 0
+        if count:
+            yield first, last
 
 
 class ShrewdModelManagerMixin(ShrewdModelManager):
@@ -86,7 +215,7 @@ class ShrewdModelManagerMixin(ShrewdModelManager):
 
 
 class AbstractShrewdModelMixin(AbstractShrewdModel):
-    class Meta:
+    class Meta(AbstractShrewdModel.Meta):
         abstract = True
     pass
 
@@ -0,0 +1,121 @@
+import time
+from collections import defaultdict
+
+import dramatiq
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import AbstractShrewdModel
+
+
+PURGE_BATCH_SIZE = 500
+
+
+def get_shrewd_models():
+    return [
+        model for model in apps.get_models()
+        if issubclass(model, AbstractShrewdModel)
+    ]
+
+def get_retention(model):
+    '''
+    Return how long soft-deleted objects of the argument model are kept,
+    as set by the SHREWD_RETENTION_DAYS setting, or None to keep them.
+    '''
+    retention_days = getattr(settings, 'SHREWD_RETENTION_DAYS', {})
+    days = retention_days.get(model._meta.label, retention_days.get('*'))
+    if days is None:
+        return None
+    return timezone.timedelta(days=days)
+
+def get_holding_references(model, _path=()):
+    '''
+    Return conditions, any of which holds objects of the argument model
+    back from being hard deleted: a reference through a protected key,
+    or through a cascading key from an object that is not itself deleted
+    (which would otherwise go down with it), or from a deleted object that
+    is itself held back, however far down the cascade it is.
+    '''
+    path = _path + (model,)
+    conditions = []
+    for rel in model._meta.related_objects:
+        if rel.many_to_many or rel.on_delete not in (models.PROTECT, models.CASCADE):
+            continue
+        referrers = rel.related_model._base_manager.filter(
+            **{rel.field.name: OuterRef(rel.field_name)}
+        )
+        # deleted objects down the cascade go along, unless they are held
+        # back themselves (cycles are taken as holding, to be safe)
+        if (rel.on_delete is models.PROTECT
+                or not issubclass(rel.related_model, AbstractShrewdModel)
+                or rel.related_model in path):
+            conditions.append(Exists(referrers))
+            continue
+        conditions.append(Exists(referrers.filter(deleted_at__isnull=True)))
+        conditions.extend(
+            Exists(referrers.filter(condition))
+            for condition in get_holding_references(rel.related_model, path)
+        )
+    return conditions
+
+def get_expired(model, retention):
+    '''
+    Return the objects of the argument model that have been
+    soft deleted for longer than the argument retention.
+    '''
+    return model.all_objects.filter(
+        deleted_at__lt=timezone.now() - retention
+    )
+
+def purge_model(model, retention, batch_size=PURGE_BATCH_SIZE, pause=0):
+    '''
+    Hard delete the objects of the argument model that have been soft
+    deleted for longer than the argument retention, and that are not
+    held back by references to them, `batch_size` of them at a time,
+    pausing `pause` seconds between batches.
+
+    The expired objects are walked in keyset batches (see
+    `ShrewedQuerySet.iter_batches`), each deleted in its own transaction.
+    Return the number of objects deleted per model label (objects deleted
+    along with the purged ones included), and the number of expired
+    objects held back.
+    '''
+    expired = get_expired(model, retention)
+    purgeable = expired
+    for condition in get_holding_references(model):
+        purgeable = purgeable.filter(~condition)
+
+    purged = defaultdict(int)
+    for i, batch in enumerate(purgeable.only('pk').iter_batches(batch_size)):
+        if i:
+            time.sleep(pause)
+        # the objects are checked again, as they are deleted
+        _, deleted = purgeable.filter(pk__in=[obj.pk for obj in batch]).delete(hard=True)
+        for label, count in deleted.items():
+            purged[label] += count
+    return dict(purged), expired.count()
+
+@dramatiq.actor
+def purge_soft_deleted(labels=None, batch_size=PURGE_BATCH_SIZE, pause=0):
+    '''
+    Purge the objects of every shrewd model (or of the models with the
+    argument labels) soft deleted for longer than their retention.
+
+    Objects held back only by references from other purged objects are
+    freed up for a later purge. Return the number of objects deleted,
+    and the number of expired objects held back, per model label.
+    '''
+    purged, held = defaultdict(int), {}
+    for model in get_shrewd_models():
+        retention = get_retention(model)
+        if retention is None or (labels and model._meta.label not in labels):
+            continue
+        model_purged, held[model._meta.label] = purge_model(
+            model, retention, batch_size, pause
+        )
+        for label, count in model_purged.items():
+            purged[label] += count
+    return dict(purged), held
@@ -1,8 +1,20 @@
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
 from django.db import connection
 from django.db.models.base import ModelBase
-from django.test import TestCase, TransactionTestCase
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
 
 from .models import AbstractShrewdModel, AbstractShrewdModelMixin
+from .tasks import purge_model, purge_soft_deleted
+from tenures.models import (
+    EsusuGroup, FutureTenure, LiveTenure, HistoricalTenure,
+    LiveSubscription, HistoricalSubscription, Watch
+)
+from users.models import User
 
 
 class AbstractionTest(TestCase):
@@ -83,6 +95,18 @@ class NonAbstractionTest(TransactionTestCase):
         self.assertTrue(self.model_cls.objects.filter(pk__lt=4).exists())
         self.assertTrue(self.model_cls.all_objects.filter(pk__lt=4).exists())
 
+    def test_bulk_delete_and_undelete_touch_updated_at(self):
+        updated_at = self.shmo1.updated_at
+
+        self.model_cls.objects.filter(pk=self.shmo1.pk).delete()
+        deleted = self.model_cls.all_objects.get(pk=self.shmo1.pk)
+        self.model_cls.all_objects.filter(pk=self.shmo1.pk).undelete()
+        undeleted = self.model_cls.all_objects.get(pk=self.shmo1.pk)
+
+        self.assertEqual(deleted.updated_at, deleted.deleted_at)
+        self.assertGreater(deleted.updated_at, updated_at)
+        self.assertEqual(undeleted.updated_at, undeleted.activated_at)
+
     def test_hard_delete(self):
         pk4 = self.shmo4.pk
         self.shmo4.delete(hard=True)
@@ -118,3 +142,205 @@ class NonAbstractionTest(TransactionTestCase):
         self.assertFalse(self.model_cls.all_objects.filter(pk__lt=4).exists())
         # no new objects, however, are added
         self.assertEqual(self.model_cls.objects.count(), 4)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }, SHREWD_CACHE_ALIAS='default')
+    def test_save_and_delete_forget_cached(self):
+        obj = self.model_cls.objects.create()
+        obj.cache_responses = True
+        key = self.model_cls.get_cache_key(obj.pk)
+
+        for forget in [obj.save, obj.delete, obj.undelete, lambda: obj.delete(hard=True)]:
+            cache.set(key, 'representation')
+            forget()
+            self.assertIsNone(cache.get(key))
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }, SHREWD_CACHE_ALIAS='default')
+    def test_save_leaves_cache_alone_unless_cached(self):
+        obj = self.model_cls.objects.create()
+        cache.set(self.model_cls.get_cache_key(obj.pk), 'representation')
+
+        with mock.patch.object(caches['default'], 'delete') as delete:
+            obj.save()
+            obj.delete()
+
+        delete.assert_not_called()
+
+    def test_iter_batches(self):
+        with self.assertNumQueries(3):
+            batches = list(self.model_cls.objects.iter_batches(3))
+
+        self.assertEqual(
+            [[obj.pk for obj in batch] for batch in batches],
+            [[1, 2, 3], [4, 5, 6], [7]]
+        )
+
+    def test_iter_batches_breaks_ties_on_order_field_by_pk(self):
+        self.model_cls.objects.update(created_at=timezone.now())
+        self.model_cls.objects.filter(pk__in=[2, 5]).update(
+            created_at=timezone.now() - timezone.timedelta(days=1)
+        )
+
+        batches = self.model_cls.objects.iter_batches(2, order_by='-created_at')
+
+        self.assertEqual(
+            [obj.pk for batch in batches for obj in batch],
+            [7, 6, 4, 3, 1, 5, 2]
+        )
+
+    def test_iter_batches_does_not_revisit_objects_that_stop_matching(self):
+        seen = []
+        for batch in self.model_cls.objects.iter_batches(2):
+            seen.extend(obj.pk for obj in batch)
+            self.model_cls.objects.filter(pk__in=[obj.pk for obj in batch]).delete()
+
+        self.assertEqual(seen, [1, 2, 3, 4, 5, 6, 7])
+        self.assertFalse(self.model_cls.objects.exists())
+
+    def test_iter_pk_ranges(self):
+        self.model_cls.objects.filter(pk__in=[2, 3]).delete()
+
+        with self.assertNumQueries(1):
+            ranges = list(self.model_cls.objects.iter_pk_ranges(2))
+
+        self.assertEqual(ranges, [(1, 4), (5, 6), (7, 7)])
+
+    def test_purge_deletes_expired_soft_deleted_objects_in_batches(self):
+        self.model_cls.objects.filter(pk__lt=5).delete()
+        # all but the fourth have been deleted for longer than 90 days
+        self.model_cls.all_objects.filter(pk__lt=4).update(
+            deleted_at=timezone.now() - timezone.timedelta(days=100)
+        )
+
+        purged, held = purge_model(
+            self.model_cls, timezone.timedelta(days=90), batch_size=2
+        )
+
+        self.assertEqual(purged, {self.model_cls._meta.label: 3})
+        self.assertEqual(held, 0)
+        self.assertEqual(
+            list(self.model_cls.all_objects.order_by('pk').values_list('pk', flat=True)),
+            [4, 5, 6, 7]
+        )
+
+    @skipUnless(connection.vendor == 'sqlite', 'query plan format is backend specific')
+    def test_shrewd_listing_uses_shrewd_index(self):
+        # the partial index only holds the objects fetched in shrewd mode
+        self.assertIn('USING INDEX', self.model_cls.objects.order_by('-created_at').explain())
+        self.assertNotIn('USING INDEX', self.model_cls.all_objects.order_by('-created_at').explain())
+
+
+class ShrewdQueryPlansCommandTest(TestCase):
+
+    def test_shows_plans_of_shrewd_models(self):
+        out = StringIO()
+        call_command('shrewd_query_plans', stdout=out)
+
+        self.assertIn('tenures.EsusuGroup', out.getvalue())
+        self.assertIn('all_objects', out.getvalue())
+
+
+class PurgeSoftDeletedTest(TestCase):
+
+    def setUp(self):
+        self.mfon = User.objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        self.group = EsusuGroup.objects.create(name='Lifelong Savers', admin=self.mfon)
+
+    def expire(self, *objs):
+        for obj in objs:
+            obj.delete()
+            type(obj).all_objects.filter(pk=obj.pk).update(
+                deleted_at=timezone.now() - timezone.timedelta(days=100)
+            )
+
+    def test_purge_holds_back_objects_referenced_through_protected_keys(self):
+        lt = LiveTenure.objects.create(amount=5000, esusu_group=self.group)
+        LiveSubscription.objects.create(tenure=lt, user=self.mfon)
+        self.expire(lt)
+
+        purged, held = purge_soft_deleted(labels=['tenures.LiveTenure'])
+
+        self.assertEqual(purged, {})
+        self.assertEqual(held, {'tenures.LiveTenure': 1})
+        self.assertTrue(LiveTenure.all_objects.filter(pk=lt.pk).exists())
+
+    def test_purge_holds_back_objects_that_would_take_undeleted_objects_down(self):
+        FutureTenure.objects.create(amount=5000, esusu_group=self.group)
+        self.expire(self.group)
+
+        purged, held = purge_soft_deleted(labels=['tenures.EsusuGroup'])
+
+        self.assertEqual(held, {'tenures.EsusuGroup': 1})
+        self.assertTrue(EsusuGroup.all_objects.filter(pk=self.group.pk).exists())
+
+    def test_purge_takes_deleted_objects_down_along(self):
+        ft = FutureTenure.objects.create(amount=5000, esusu_group=self.group)
+        ft.delete()
+        self.expire(self.group)
+
+        purged, held = purge_soft_deleted(labels=['tenures.EsusuGroup'])
+
+        self.assertEqual(purged, {'tenures.EsusuGroup': 1, 'tenures.FutureTenure': 1})
+        self.assertFalse(FutureTenure.all_objects.exists())
+
+    def test_purge_holds_back_objects_whose_deleted_objects_are_protected(self):
+        ht = HistoricalTenure.objects.create(
+            amount=5000, esusu_group=self.group, live_at=timezone.now()
+        )
+        HistoricalSubscription.objects.create(tenure=ht, user=self.mfon)
+        ht.delete()
+        self.expire(self.group)
+
+        purged, held = purge_soft_deleted(labels=['tenures.EsusuGroup'])
+
+        self.assertEqual(purged, {})
+        self.assertEqual(held, {'tenures.EsusuGroup': 1})
+        self.assertTrue(HistoricalTenure.all_objects.filter(pk=ht.pk).exists())
+
+    def test_purge_holds_back_objects_whose_deleted_objects_would_take_undeleted_objects_down(self):
+        ft = FutureTenure.objects.create(amount=5000, esusu_group=self.group)
+        watch = Watch.objects.create(tenure=ft, user=self.mfon)
+        ft.delete()
+        self.expire(self.group)
+
+        purged, held = purge_soft_deleted(labels=['tenures.EsusuGroup'])
+
+        self.assertEqual(purged, {})
+        self.assertEqual(held, {'tenures.EsusuGroup': 1})
+        self.assertTrue(Watch.objects.filter(pk=watch.pk).exists())
+
+    def test_purge_takes_deleted_objects_down_along_the_whole_cascade(self):
+        ft = FutureTenure.objects.create(amount=5000, esusu_group=self.group)
+        Watch.objects.create(tenure=ft, user=self.mfon).delete()
+        ft.delete()
+        self.expire(self.group)
+
+        purged, held = purge_soft_deleted(labels=['tenures.EsusuGroup'])
+
+        self.assertEqual(purged, {
+            'tenures.EsusuGroup': 1, 'tenures.FutureTenure': 1, 'tenures.Watch': 1
+        })
+        self.assertFalse(Watch.all_objects.exists())
+
+    @override_settings(SHREWD_RETENTION_DAYS={'tenures.EsusuGroup': None, '*': 90})
+    def test_purge_keeps_objects_of_models_without_retention(self):
+        self.expire(self.group)
+
+        purged, held = purge_soft_deleted()
+
+        self.assertNotIn('tenures.EsusuGroup', held)
+        self.assertTrue(EsusuGroup.all_objects.filter(pk=self.group.pk).exists())
+
+    def test_purge_command_reports_objects_purged(self):
+        self.expire(self.group)
+        out = StringIO()
+        call_command('purge_soft_deleted', 'tenures.EsusuGroup', '--batch-size=10', stdout=out)
+
+        self.assertIn('tenures.EsusuGroup: purged 1, held back 0', out.getvalue())
+        self.assertIn('Purged 1 object(s)', out.getvalue())
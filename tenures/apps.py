@@ -5,4 +5,5 @@ class TenuresConfig(AppConfig):
     name = 'tenures'
 
     def ready(self):
+        import tenures.checks
         import tenures.signals
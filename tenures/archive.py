@@ -0,0 +1,189 @@
+import gzip
+import json
+import os
+from itertools import chain
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import ArchivedContributor, Contribution, HistoricalTenure
+
+
+# the fields of archived contributions
+ARCHIVE_FIELDS = ('id', 'historical_tenure', 'user', 'amount', 'created_at', 'deleted_at')
+# contributions deleted from the database at a time, once archived
+ARCHIVE_BATCH_SIZE = 1000
+# days historical tenures are left alone for, before their contributions are archived
+ARCHIVE_AFTER_DAYS = 30
+
+
+def get_archive_paths(ht_pk):
+    '''
+    Return the paths of the archive of the contributions to the
+    historical tenure with the passed pk, and of its index.
+    '''
+    directory = settings.CONTRIBUTION_ARCHIVE_DIR
+    return (
+        os.path.join(directory, '{}.ndjson.gz'.format(ht_pk)),
+        os.path.join(directory, '{}.index.json'.format(ht_pk)),
+    )
+
+def read_index(ht_pk):
+    '''
+    Return the index of the archived contributions to the historical
+    tenure with the passed pk, or None if none have been archived.
+    '''
+    _, index_path = get_archive_paths(ht_pk)
+    try:
+        with open(index_path) as index_file:
+            return json.load(index_file)
+    except FileNotFoundError:
+        return None
+
+def _write_index(index_path, index):
+    # written aside and moved in place, so it is never seen half written
+    with open(index_path + '.tmp', 'w') as index_file:
+        json.dump(index, index_file, cls=DjangoJSONEncoder)
+        index_file.flush()
+        os.fsync(index_file.fileno())
+    os.replace(index_path + '.tmp', index_path)
+
+def _delete_archived(ht_pk, last_pk, batch_size):
+    archived = Contribution.all_objects.filter(
+        historical_tenure_id=ht_pk, pk__lte=last_pk
+    ).only('pk')
+    for batch in archived.iter_batches(batch_size):
+        Contribution.all_objects.filter(pk__in=[c.pk for c in batch]).delete(hard=True)
+
+def archive_tenure_contributions(ht_pk, batch_size=ARCHIVE_BATCH_SIZE):
+    '''
+    Append the contributions to the historical tenure with the passed pk
+    to its archive, then delete them from the database, `batch_size` of
+    them at a time. Return the number of contributions archived.
+
+    The archive is a gzipped file of newline delimited json, which gets
+    a new gzip member each time it is appended to. Its index keeps the
+    count and total of the contributions in it, the span of their dates,
+    the users who made them, and the greatest pk among them. The users
+    are also recorded as archived contributors of the tenure, to be
+    looked up by. Contributions up to that pk are only
+    deleted once the archive and its index are safely on disk, and are
+    left out of later archivals, so an archival that dies half way can
+    simply be run again.
+    '''
+    archive_path, index_path = get_archive_paths(ht_pk)
+    index = read_index(ht_pk) or {
+        'historical_tenure': ht_pk, 'count': 0, 'total': '0',
+        'first_created_at': None, 'last_created_at': None, 'last_pk': 0, 'users': [],
+    }
+    rows = Contribution.all_objects.filter(
+        historical_tenure_id=ht_pk, pk__gt=index['last_pk']
+    ).order_by('pk').values(*ARCHIVE_FIELDS).iterator(chunk_size=batch_size)
+
+    count, total, users, last_row = 0, Decimal(0), set(), None
+    first_row = next(rows, None)
+    if first_row is not None:
+        os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+        with open(archive_path, 'ab') as archive_file:
+            with gzip.GzipFile(fileobj=archive_file, mode='ab') as gzip_file:
+                for row in chain([first_row], rows):
+                    gzip_file.write((json.dumps(row, cls=DjangoJSONEncoder) + '\n').encode())
+                    count += 1
+                    total += row['amount']
+                    users.add(row['user'])
+                    last_row = row
+            archive_file.flush()
+            os.fsync(archive_file.fileno())
+
+    if last_row is not None:
+        index.update(
+            count=index['count'] + count,
+            total=str(Decimal(index['total']) + total),
+            first_created_at=index['first_created_at'] or first_row['created_at'],
+            last_created_at=last_row['created_at'],
+            last_pk=last_row['id'],
+            users=sorted(users.union(index.get('users', []))),
+        )
+        _write_index(index_path, index)
+    # off the index, so those of an archival that died are recorded too
+    ArchivedContributor.objects.bulk_create((
+        ArchivedContributor(historical_tenure_id=ht_pk, user_id=user_pk)
+        for user_pk in index.get('users', [])
+    ), ignore_conflicts=True)
+    # including any archived by an earlier archival which died before deleting them
+    _delete_archived(ht_pk, index['last_pk'], batch_size)
+    return count
+
+def get_archivable_tenures(after_days=ARCHIVE_AFTER_DAYS):
+    '''
+    Return the historical tenures dissolved more than `after_days` days
+    ago which still have contributions in the database.
+    '''
+    return HistoricalTenure.all_objects.filter(
+        Exists(Contribution.all_objects.filter(historical_tenure=OuterRef('pk'))),
+        created_at__lt=timezone.now() - timezone.timedelta(days=after_days)
+    )
+
+def get_archived_tenure_pks(user_pk=None, ht_pk=None):
+    '''
+    Return the pks of the historical tenures that have contributions
+    archived by the user with the passed pk, and/or with the passed pk
+    themselves.
+    '''
+    contributors = ArchivedContributor.objects.all()
+    if user_pk is not None:
+        contributors = contributors.filter(user_id=user_pk)
+    if ht_pk is not None:
+        contributors = contributors.filter(historical_tenure_id=ht_pk)
+    return list(
+        contributors.order_by('historical_tenure_id').distinct()
+        .values_list('historical_tenure_id', flat=True)
+    )
+
+def _load_row(line):
+    row = json.loads(line)
+    row['amount'] = Decimal(row['amount'])
+    for field in ('created_at', 'deleted_at'):
+        row[field] = row[field] and parse_datetime(row[field])
+    return row
+
+def iter_archived_contributions(ht_pk, last_pk=None):
+    '''
+    Yield the archived contributions to the historical tenure with
+    the passed pk (up to the passed last pk, if given), as dicts
+    of their archive fields.
+
+    Contributions appended again, by an archival that died before
+    writing its index, are skipped.
+    '''
+    archive_path, _ = get_archive_paths(ht_pk)
+    if not os.path.exists(archive_path):
+        return
+    seen_pk = 0
+    with gzip.open(archive_path, 'rt') as archive_file:
+        for line in archive_file:
+            row = _load_row(line)
+            if last_pk is not None and row['id'] > last_pk:
+                return
+            if row['id'] > seen_pk:
+                seen_pk = row['id']
+                yield row
+
+def iter_historical_ledger(ht_pk):
+    '''
+    Yield all the contributions to the historical tenure with the passed
+    pk, in the order they were made, whether archived or not.
+
+    The archived ones are read off the archive up to the last pk in its
+    index, and the rest off the database, so none is yielded twice.
+    '''
+    index = read_index(ht_pk)
+    last_pk = index['last_pk'] if index else 0
+    yield from iter_archived_contributions(ht_pk, last_pk)
+    yield from Contribution.all_objects.filter(
+        historical_tenure_id=ht_pk, pk__gt=last_pk
+    ).order_by('pk').values(*ARCHIVE_FIELDS).iterator()
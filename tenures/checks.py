@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches, deploy=True)
+def check_membership_cache(app_configs, **kwargs):
+    '''
+    Warn when group memberships are cached in local memory, where they
+    are only forgotten by the process that wrote the memberships.
+    '''
+    alias = getattr(settings, 'MEMBERSHIP_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    if backend != 'django.core.cache.backends.locmem.LocMemCache':
+        return []
+    return [Warning(
+        'Group memberships are cached in local memory.',
+        hint=(
+            'Point MEMBERSHIP_CACHE_ALIAS at a cache shared by all processes '
+            '(memcached, redis, a database cache), so that memberships written '
+            'in one process are forgotten in all.'
+        ),
+        id='tenures.W001',
+    )]
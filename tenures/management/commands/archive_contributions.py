@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tenures import archive, tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the contributions of dissolved tenures out of the database, '
+        'into gzipped archives under CONTRIBUTION_ARCHIVE_DIR.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--after-days', type=int, default=archive.ARCHIVE_AFTER_DAYS,
+            help='Only archive tenures dissolved more than this many days ago.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=archive.ARCHIVE_BATCH_SIZE,
+            help='The number of archived contributions to delete per transaction.'
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        archived = tasks.archive_historical_contributions(
+            after_days=options['after_days'], batch_size=options['batch_size']
+        )
+        self.stdout.write(
+            f'Archived {archived} contribution(s) in {time.monotonic() - started:.2f}s.'
+        )
@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from tenures import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Create the upcoming monthly partitions of the contribution ledger, '
+        'and detach the old ones (on databases that partition it).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=partitions.PARTITIONS_AHEAD,
+            help='The number of months after the current one to create partitions for.'
+        )
+        parser.add_argument(
+            '--detach-before', default=None, metavar='YYYY-MM',
+            help='Detach the partitions for the months before this one.'
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned(connection):
+            self.stdout.write('The contribution ledger is not partitioned on this database.')
+            return
+
+        for name in partitions.create_contribution_partitions(options['ahead']):
+            self.stdout.write(f'Created {name}.')
+
+        if options['detach_before'] is not None:
+            try:
+                before = datetime.strptime(options['detach_before'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--detach-before should be a month, as YYYY-MM.')
+            for name in partitions.detach_contribution_partitions(before):
+                self.stdout.write(f'Detached {name}.')
+
+        for name in partitions.get_partitions(connection):
+            self.stdout.write(f'  {name}')
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tenures import tasks
+
+
+class Command(BaseCommand):
+    help = 'Dissolve the live tenures that have paid out to all their subscribers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=tasks.DISSOLUTION_BATCH_SIZE,
+            help='The number of live tenures to dissolve per transaction.'
+        )
+        parser.add_argument(
+            '--every', type=float, default=None, metavar='SECONDS',
+            help='Keep sweeping, pausing this many seconds between sweeps.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options['batch_size'])
+            if options['every'] is None:
+                return
+            time.sleep(options['every'])
+
+    def sweep(self, batch_size):
+        started = time.monotonic()
+        dissolved = tasks.sweep_finished_live_tenures(batch_size=batch_size)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Dissolved {dissolved} live tenure(s) in {elapsed:.2f}s '
+            f'({dissolved / elapsed if elapsed else 0:.1f}/s).'
+        )
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from esusu import streaming
+from tenures import tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'Export the ledger of contributions, per tenure and/or per user. '
+        'Archived contributions are only exported per historical tenure or '
+        'per user, not with the whole ledger.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tenure', type=int, default=None,
+            help='Only export contributions to the live tenure with this pk.'
+        )
+        parser.add_argument(
+            '--historical-tenure', type=int, default=None,
+            help='Only export contributions to the historical tenure with this pk.'
+        )
+        parser.add_argument(
+            '--user', type=int, default=None,
+            help='Only export contributions by the user with this pk.'
+        )
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'], default='csv',
+            help='The format to export contributions in.'
+        )
+        parser.add_argument(
+            '--output', default=None, metavar='PATH',
+            help='Write the export to this file, instead of to stdout.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=tasks.LEDGER_CHUNK_SIZE,
+            help='The number of contributions to read from the database at a time.'
+        )
+
+    def handle(self, *args, **options):
+        rows = tasks.iter_contribution_ledger(
+            tenure_pk=options['tenure'], user_pk=options['user'],
+            historical_tenure_pk=options['historical_tenure'],
+            chunk_size=options['chunk_size']
+        )
+        render, _ = streaming.STREAM_FORMATS[options['format']]
+
+        if options['output'] is None:
+            for piece in render(rows):
+                self.stdout.write(piece, ending='')
+            return
+
+        with open(options['output'], 'w', newline='') as output:
+            for piece in render(rows):
+                output.write(piece)
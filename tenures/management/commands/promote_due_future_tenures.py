@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tenures import tasks
+
+
+class Command(BaseCommand):
+    help = 'Promote the future tenures whose go-live time has passed.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=tasks.PROMOTION_BATCH_SIZE,
+            help='The number of future tenures to promote per transaction.'
+        )
+        parser.add_argument(
+            '--every', type=float, default=None, metavar='SECONDS',
+            help='Keep sweeping, pausing this many seconds between sweeps.'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options['batch_size'])
+            if options['every'] is None:
+                return
+            time.sleep(options['every'])
+
+    def sweep(self, batch_size):
+        started = time.monotonic()
+        promoted = tasks.sweep_due_future_tenures(batch_size=batch_size)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'Promoted {promoted} future tenure(s) in {elapsed:.2f}s '
+            f'({promoted / elapsed if elapsed else 0:.1f}/s).'
+        )
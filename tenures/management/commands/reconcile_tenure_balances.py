@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from tenures import tasks
+
+
+class Command(BaseCommand):
+    help = 'Check the recorded balances of live tenures against their contributions.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Overwrite drifted totals and balances with the recomputed ones.'
+        )
+
+    def handle(self, *args, **options):
+        drifts = tasks.reconcile_tenure_balances(fix=options['fix'])
+        for pk, recorded, recomputed in drifts:
+            self.stdout.write(
+                f'Live tenure {pk} recorded {recorded} collected, '
+                f'but its contributions add up to {recomputed}.'
+            )
+        self.stdout.write(
+            f'{len(drifts)} live tenure(s) drifted'
+            f'{" and were fixed" if options["fix"] and drifts else ""}.'
+        )
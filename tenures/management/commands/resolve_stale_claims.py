@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from tenures import tasks
+
+
+class Command(BaseCommand):
+    help = (
+        'List the collection and payout ledger entries left claimed by runs '
+        'that died or by charges and credits of unknown outcome, and release '
+        'the ones known not to have been charged or paid.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--release', type=int, nargs='+', default=[], metavar='PK',
+            help='Mark these stale claims as failed, to be charged again on a rerun.'
+        )
+        parser.add_argument(
+            '--release-payouts', type=int, nargs='+', default=[], metavar='PK',
+            help='Mark these stale payout claims as failed, to be credited again on a rerun.'
+        )
+
+    def handle(self, *args, **options):
+        if options['release']:
+            released = tasks.release_stale_claims(options['release'])
+            self.stdout.write(f'Released {released} stale claim(s).')
+        if options['release_payouts']:
+            released = tasks.release_stale_payout_claims(options['release_payouts'])
+            self.stdout.write(f'Released {released} stale payout claim(s).')
+
+        stale = tasks.get_stale_claims().order_by('charge_date', 'pk')
+        for entry in stale.values('pk', 'run_id', 'subscription_id', 'charge_date'):
+            self.stdout.write(
+                f'Entry {entry["pk"]} of run {entry["run_id"]} claimed subscription '
+                f'{entry["subscription_id"]} for {entry["charge_date"]}.'
+            )
+        self.stdout.write(f'{stale.count()} stale claim(s) left to resolve.')
+
+        stale = tasks.get_stale_payout_claims().order_by('pay_date', 'pk')
+        for entry in stale.values('pk', 'tenure_id', 'subscription_id', 'pay_date'):
+            self.stdout.write(
+                f'Payout entry {entry["pk"]} claimed tenure {entry["tenure_id"]} '
+                f'for subscription {entry["subscription_id"]} on {entry["pay_date"]}.'
+            )
+        self.stdout.write(f'{stale.count()} stale payout claim(s) left to resolve.')
@@ -0,0 +1,32 @@
+# Generated by Django 3.0 on 2026-10-18 02:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionRun',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('activated_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('charge_date', models.DateField()),
+                ('shards', models.PositiveIntegerField(default=0)),
+                ('pending_shards', models.PositiveIntegerField(default=0)),
+                ('collected', models.PositiveIntegerField(default=0, help_text='The number of contributions collected on this run.')),
+                ('failed', models.PositiveIntegerField(default=0, help_text='The number of due subscriptions that could not be charged on this run.')),
+                ('finished_at', models.DateTimeField(null=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
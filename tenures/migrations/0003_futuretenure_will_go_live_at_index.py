@@ -0,0 +1,19 @@
+# Generated by Django 3.0 on 2026-10-18 02:27
+
+from django.db import migrations, models
+import tenures.utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0002_collectionrun'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='futuretenure',
+            name='will_go_live_at',
+            field=models.DateTimeField(db_index=True, default=tenures.utils.two_weeks_from_now),
+        ),
+    ]
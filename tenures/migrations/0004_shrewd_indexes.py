@@ -0,0 +1,56 @@
+# Generated by Django 3.0 on 2026-10-18 02:32
+
+from django.db import migrations, models
+import shrewd_models.models
+import tenures.utils
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0003_futuretenure_will_go_live_at_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='futuretenure',
+            name='will_go_live_at',
+            field=models.DateTimeField(default=tenures.utils.two_weeks_from_now),
+        ),
+        migrations.AddIndex(
+            model_name='collectionrun',
+            index=shrewd_models.models.ShrewdIndex(fields=['-created_at'], name='tenures_col_created_ab4858_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=shrewd_models.models.ShrewdIndex(fields=['-created_at'], name='tenures_con_created_84a6a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='esusugroup',
+            index=shrewd_models.models.ShrewdIndex(fields=['-created_at'], name='tenures_esu_created_ba3770_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='futuretenure',
+            index=shrewd_models.models.ShrewdIndex(fields=['-will_go_live_at', '-created_at'], name='tenures_fut_will_go_64292e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicalsubscription',
+            index=shrewd_models.models.ShrewdIndex(fields=['tenure', '-created_at'], name='tenures_his_tenure__f2de1d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='historicaltenure',
+            index=shrewd_models.models.ShrewdIndex(fields=['esusu_group', '-live_at'], name='tenures_his_esusu_g_2600e7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livesubscription',
+            index=shrewd_models.models.ShrewdIndex(fields=['tenure', '-created_at'], name='tenures_liv_tenure__7c619d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livetenure',
+            index=shrewd_models.models.ShrewdIndex(fields=['-live_at', '-created_at'], name='tenures_liv_live_at_e57422_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='watch',
+            index=shrewd_models.models.ShrewdIndex(fields=['tenure', '-created_at'], name='tenures_wat_tenure__44c824_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.0 on 2026-10-18 02:33
+
+from django.db import migrations
+import shrewd_models.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0004_shrewd_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='livesubscription',
+            index=shrewd_models.models.ShrewdIndex(fields=['next_charge_date'], name='tenures_liv_next_ch_d4bbb4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='livesubscription',
+            index=shrewd_models.models.ShrewdIndex(fields=['pay_date'], name='tenures_liv_pay_dat_2bb596_idx'),
+        ),
+    ]
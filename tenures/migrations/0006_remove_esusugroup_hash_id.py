@@ -0,0 +1,17 @@
+# Generated by Django 3.0 on 2026-10-18 02:37
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0005_livesubscription_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='esusugroup',
+            name='hash_id',
+        ),
+    ]
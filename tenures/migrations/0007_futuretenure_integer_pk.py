@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+import django.db.models.deletion
+
+import shrewd_models.models
+
+
+def remember_watched_groups(apps, schema_editor):
+    '''
+    Note the group of each watched future tenure, while the
+    watches still point at future tenures by their hash ids.
+    '''
+    FutureTenure = apps.get_model('tenures', 'FutureTenure')
+    Watch = apps.get_model('tenures', 'Watch')
+    Watch._base_manager.update(tenure_group=Subquery(
+        FutureTenure._base_manager.filter(
+            pk=OuterRef('tenure_id')
+        ).values('esusu_group_id')[:1]
+    ))
+
+
+def point_watches_at_integer_pks(apps, schema_editor):
+    '''
+    Point each watch at the new integer pk of the future tenure
+    belonging to the group noted on it.
+    '''
+    FutureTenure = apps.get_model('tenures', 'FutureTenure')
+    Watch = apps.get_model('tenures', 'Watch')
+    Watch._base_manager.update(tenure_id=Subquery(
+        FutureTenure._base_manager.filter(
+            esusu_group_id=OuterRef('tenure_group')
+        ).values('pk')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tenures', '0006_remove_esusugroup_hash_id'),
+    ]
+
+    operations = [
+        # detach watches from the hash id primary key
+        migrations.RemoveField(
+            model_name='futuretenure',
+            name='watchers',
+        ),
+        migrations.AlterUniqueTogether(
+            name='watch',
+            unique_together=set(),
+        ),
+        migrations.RemoveIndex(
+            model_name='watch',
+            name='tenures_wat_tenure__44c824_idx',
+        ),
+        migrations.AddField(
+            model_name='watch',
+            name='tenure_group',
+            field=models.IntegerField(null=True),
+        ),
+        migrations.RunPython(remember_watched_groups),
+        migrations.RemoveField(
+            model_name='watch',
+            name='tenure',
+        ),
+
+        # swap the hash id primary key for an integer one
+        migrations.RemoveField(
+            model_name='futuretenure',
+            name='hash_id',
+        ),
+        migrations.AddField(
+            model_name='futuretenure',
+            name='id',
+            field=models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+            preserve_default=False,
+        ),
+
+        # reattach watches by the integer primary key
+        migrations.AddField(
+            model_name='watch',
+            name='tenure',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='watches', to='tenures.FutureTenure'),
+        ),
+        migrations.RunPython(point_watches_at_integer_pks),
+        migrations.AlterField(
+            model_name='watch',
+            name='tenure',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='watches', to='tenures.FutureTenure'),
+        ),
+        migrations.RemoveField(
+            model_name='watch',
+            name='tenure_group',
+        ),
+        migrations.AlterUniqueTogether(
+            name='watch',
+            unique_together={('tenure', 'user')},
+        ),
+        migrations.AddIndex(
+            model_name='watch',
+            index=shrewd_models.models.ShrewdIndex(fields=['tenure', '-created_at'], name='tenures_wat_tenure__44c824_idx'),
+        ),
+        migrations.AddField(
+            model_name='futuretenure',
+            name='watchers',
+            field=models.ManyToManyField(related_name='_futuretenure_watchers_+', through='tenures.Watch', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.0 on 2026-10-18 02:45
+
+from django.db import migrations
+import shrewd_models.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0007_futuretenure_integer_pk'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contribution',
+            name='tenures_con_created_84a6a7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=shrewd_models.models.ShrewdIndex(fields=['tenure', 'created_at'], name='tenures_con_tenure__080fe5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contribution',
+            index=shrewd_models.models.ShrewdIndex(fields=['user', 'created_at'], name='tenures_con_user_id_5eb19e_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.0 on 2026-10-18 02:47
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, Q, Sum
+
+
+def backfill_balances(apps, schema_editor):
+    '''
+    Total up the contributions on each live tenure, keeping the ones
+    since its previous pay date as its balance.
+    '''
+    LiveTenure = apps.get_model('tenures', 'LiveTenure')
+    Contribution = apps.get_model('tenures', 'Contribution')
+    contributions = Contribution._base_manager.filter(
+        deleted_at__isnull=True, activated_at__isnull=False
+    ).order_by().values('tenure_id')
+    collected = dict(
+        contributions.annotate(total=Sum('amount')).values_list('tenure_id', 'total')
+    )
+    unpaid = dict(
+        contributions.filter(
+            Q(tenure__previous_pay_date__isnull=True)
+            | Q(created_at__date__gt=F('tenure__previous_pay_date'))
+        ).annotate(total=Sum('amount')).values_list('tenure_id', 'total')
+    )
+    for pk, total in collected.items():
+        balance = unpaid.get(pk, Decimal(0))
+        LiveTenure._base_manager.filter(pk=pk).update(
+            balance=balance, total_collected=total, total_paid_out=total - balance
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0008_contribution_ledger_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='livetenure',
+            name='balance',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='The amount collected on this tenure and not yet paid out.', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='livetenure',
+            name='total_collected',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='The amount collected on this tenure, all told.', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='livetenure',
+            name='total_paid_out',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='The amount paid out of this tenure, all told.', max_digits=12),
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
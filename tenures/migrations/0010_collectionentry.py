@@ -0,0 +1,41 @@
+# Generated by Django 3.0 on 2026-10-18 02:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import shrewd_models.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0009_livetenure_balance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('activated_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('charge_date', models.DateField()),
+                ('status', models.CharField(choices=[('Claimed', 'Claimed'), ('Charged', 'Charged'), ('Failed', 'Failed')], default='Claimed', help_text='How the charge went. Entries left claimed by a run that died may or may not have been charged.', max_length=16)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='tenures.CollectionRun')),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collection_entries', to='tenures.LiveSubscription')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='collectionentry',
+            index=shrewd_models.models.ShrewdIndex(fields=['-created_at'], name='tenures_col_created_051229_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='collectionentry',
+            unique_together={('subscription', 'charge_date')},
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.0 on 2026-10-18 02:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0010_collectionentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contribution',
+            name='historical_tenure',
+            field=models.ForeignKey(help_text='The tenure this contribution was made to, once it is dissolved.', null=True, on_delete=django.db.models.deletion.PROTECT, related_name='contributions', to='tenures.HistoricalTenure'),
+        ),
+        migrations.AddField(
+            model_name='historicaltenure',
+            name='live_tenure_id',
+            field=models.PositiveIntegerField(editable=False, help_text='The pk this tenure had while it was live.', null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name='historicaltenure',
+            name='total_collected',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='The amount collected on this tenure while it was live.', max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='historicaltenure',
+            name='total_paid_out',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='The amount paid out of this tenure while it was live.', max_digits=12),
+        ),
+        migrations.AlterField(
+            model_name='contribution',
+            name='tenure',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='contributions', to='tenures.LiveTenure'),
+        ),
+    ]
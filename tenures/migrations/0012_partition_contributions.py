@@ -0,0 +1,86 @@
+from django.db import migrations
+from django.utils import timezone
+
+from tenures import partitions
+
+
+def rebuild_contributions(apps, schema_editor, partitioned):
+    '''
+    Rebuild the table of contributions, either partitioned by the month
+    of `created_at` (with a default partition to catch stray rows), or
+    as a plain table, keeping its rows, keys and indexes.
+    '''
+    connection = schema_editor.connection
+    if not partitions.supports_partitioning(connection):
+        return
+    Contribution = apps.get_model('tenures', 'Contribution')
+    table = Contribution._meta.db_table
+    old = table + '_old'
+    qn = schema_editor.quote_name
+    execute = schema_editor.execute
+
+    execute('ALTER TABLE {} RENAME TO {}'.format(qn(table), qn(old)))
+    if partitioned:
+        execute(
+            'CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+            'PARTITION BY RANGE (created_at)'.format(qn(table), qn(old))
+        )
+        # the primary key of a partitioned table has to take in its
+        # partition key; ids stay unique, as they come off a sequence
+        execute('ALTER TABLE {} ADD PRIMARY KEY (id, created_at)'.format(qn(table)))
+        execute('CREATE TABLE {} PARTITION OF {} DEFAULT'.format(
+            qn(partitions.get_default_partition_name(table)), qn(table)
+        ))
+    else:
+        execute('CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'.format(
+            qn(table), qn(old)
+        ))
+        execute('ALTER TABLE {} ADD PRIMARY KEY (id)'.format(qn(table)))
+    execute('ALTER SEQUENCE {} OWNED BY {}.id'.format(qn(table + '_id_seq'), qn(table)))
+
+    if partitioned:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT MIN(created_at) FROM {}'.format(qn(old)))
+            first = cursor.fetchone()[0] or timezone.now()
+        month = partitions.get_month(first)
+        last = partitions.add_months(
+            partitions.get_month(timezone.now()), partitions.PARTITIONS_AHEAD
+        )
+        while month <= last:
+            partitions.create_partition(connection, table, month)
+            month = partitions.add_months(month, 1)
+
+    execute('INSERT INTO {} SELECT * FROM {}'.format(qn(table), qn(old)))
+    # dropping the old table (along with any partitions) drops its keys and indexes
+    execute('DROP TABLE {}'.format(qn(old)))
+
+    for field in Contribution._meta.local_fields:
+        if field.remote_field is None:
+            continue
+        execute(
+            'ALTER TABLE {} ADD FOREIGN KEY ({}) REFERENCES {} ({}) '
+            'DEFERRABLE INITIALLY DEFERRED'.format(
+                qn(table), qn(field.column),
+                qn(field.target_field.model._meta.db_table), qn(field.target_field.column)
+            )
+        )
+        execute('CREATE INDEX ON {} ({})'.format(qn(table), qn(field.column)))
+    for index in Contribution._meta.indexes:
+        schema_editor.add_index(Contribution, index)
+
+def partition_contributions(apps, schema_editor):
+    rebuild_contributions(apps, schema_editor, partitioned=True)
+
+def unpartition_contributions(apps, schema_editor):
+    rebuild_contributions(apps, schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0011_tenure_dissolution'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_contributions, unpartition_contributions),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0012_partition_contributions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collectionrun',
+            name='failed_shards',
+            field=models.PositiveIntegerField(default=0, help_text='The number of shards of this run that died before recording their outcome.'),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 3.0 on 2026-10-18 03:31
+
+import os
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import shrewd_models.models
+
+from tenures import archive
+
+
+def record_archived_contributors(apps, schema_editor):
+    '''
+    Record the users with contributions in the archives written so far,
+    off their indexes, or off the archives where the index keeps none.
+    '''
+    ArchivedContributor = apps.get_model('tenures', 'ArchivedContributor')
+    directory = settings.CONTRIBUTION_ARCHIVE_DIR
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if not name.endswith('.index.json'):
+            continue
+        index = archive.read_index(int(name.split('.')[0]))
+        ht_pk = index['historical_tenure']
+        users = index.get('users') or {
+            row['user'] for row in archive.iter_archived_contributions(ht_pk)
+        }
+        ArchivedContributor.objects.bulk_create((
+            ArchivedContributor(historical_tenure_id=ht_pk, user_id=user_pk)
+            for user_pk in users
+        ), ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tenures', '0013_collectionrun_failed_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedContributor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('activated_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('historical_tenure', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_contributors', to='tenures.HistoricalTenure')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedcontributor',
+            index=shrewd_models.models.ShrewdIndex(fields=['-created_at'], name='tenures_arc_created_d83676_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivedcontributor',
+            unique_together={('historical_tenure', 'user')},
+        ),
+        migrations.RunPython(record_archived_contributors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.0 on 2026-10-18 03:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import shrewd_models.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenures', '0014_archivedcontributor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PayoutEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('activated_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('pay_date', models.DateField()),
+                ('claim', models.UUIDField()),
+                ('status', models.CharField(choices=[('Claimed', 'Claimed'), ('Paid', 'Paid'), ('Failed', 'Failed')], default='Claimed', help_text='How the credit went. Entries left claimed by a run that died, or by a credit of unknown outcome, may or may not have been paid.', max_length=16)),
+                ('subscription', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payout_entries', to='tenures.LiveSubscription')),
+                ('tenure', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='payout_entries', to='tenures.LiveTenure')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'abstract': False,
+            },
+        ),
+        migrations.AddIndex(
+            model_name='payoutentry',
+            index=shrewd_models.models.ShrewdIndex(fields=['-created_at'], name='tenures_pay_created_24eac0_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='payoutentry',
+            unique_together={('tenure', 'pay_date')},
+        ),
+    ]
@@ -1,36 +1,105 @@
+from functools import lru_cache
+
 from django.db import models
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.utils import timezone
 from hashids import Hashids
 
 from . import utils
-from shrewd_models.models import AbstractShrewdModelMixin
+from shrewd_models.models import AbstractShrewdModelMixin, ShrewdIndex
 
 
 hasher = Hashids(min_length=11)
+HASH_ID_CACHE_SIZE = 4096
+
+MEMBERSHIP_CACHE_KEY = 'tenures:member-group-pks:{}'
+MEMBERSHIP_CACHE_TIMEOUT = 60 * 5
+
+def get_membership_cache():
+    '''
+    return the cache named by the MEMBERSHIP_CACHE_ALIAS setting, which has
+    to be shared by all processes for memberships to be forgotten in all.
+    '''
+    return caches[getattr(settings, 'MEMBERSHIP_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
 
 class EsusuGroup(AbstractShrewdModelMixin, models.Model):
     name = models.CharField(max_length=64)
-    hash_id = models.CharField(max_length=64, editable=False)
     admin = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
         related_name='+'
     )
 
-    class Meta:
+    class Meta(AbstractShrewdModelMixin.Meta):
         ordering = ['-created_at']
 
     @staticmethod
+    @lru_cache(maxsize=HASH_ID_CACHE_SIZE)
     def get_hash_id(pk):
         '''
         return a unique hash built from the passed product key.
         '''
         return hasher.encode(pk)
 
+    @staticmethod
+    @lru_cache(maxsize=HASH_ID_CACHE_SIZE)
+    def get_pk_from_hash_id(hash_id):
+        '''
+        return the product key the passed hash was built from,
+        or None if it is not a hash built by `get_hash_id`.
+        '''
+        pks = hasher.decode(hash_id)
+        if len(pks) != 1 or EsusuGroup.get_hash_id(pks[0]) != hash_id:
+            return None
+        return pks[0]
+
+    @property
+    def hash_id(self):
+        '''
+        The unique hash of the group, built from its product key.
+
+        It is derived rather than stored, so creating a group (or many
+        groups at once) takes a single write.
+        '''
+        if self.pk is None:
+            return ''
+        return EsusuGroup.get_hash_id(self.pk)
+
     def __str__(self):
         return self.name or self.hash_id or str(self.pk)
 
+    @staticmethod
+    def get_member_group_pks(user_pk):
+        '''
+        Return the set of pks of the groups on which the user identified
+        by the passed product key is watching or subscribed to a tenure.
+
+        The set is cached per user, and forgotten whenever the user's
+        watches or live subscriptions are saved or deleted. Queryset updates
+        and soft deletes send no signals, so code that moves watches or
+        subscriptions between tenures (or soft deletes them) in bulk has to
+        forget the memberships of their users itself.
+        '''
+        cache = get_membership_cache()
+        key = MEMBERSHIP_CACHE_KEY.format(user_pk)
+        group_pks = cache.get(key)
+        if group_pks is None:
+            group_pks = set(
+                Watch.objects.filter(user_id=user_pk).order_by()
+                .values_list('tenure__esusu_group_id', flat=True)
+                .union(
+                    LiveSubscription.objects.filter(user_id=user_pk).order_by()
+                    .values_list('tenure__esusu_group_id', flat=True)
+                )
+            )
+            cache.set(key, group_pks, MEMBERSHIP_CACHE_TIMEOUT)
+        return group_pks
+
+    @staticmethod
+    def forget_member_group_pks(*user_pks):
+        get_membership_cache().delete_many([MEMBERSHIP_CACHE_KEY.format(pk) for pk in user_pks])
+
     def has_member(self, user):
         '''
         Return whether the argument user is a member of the group.
@@ -38,22 +107,21 @@ class EsusuGroup(AbstractShrewdModelMixin, models.Model):
         A user is a member of a group if they are either watching a future
         tenure on the group, or are subscribed to a live tenure on it.
         '''
-        return (user == self.admin
-            or self.has_watching_member(user)
-            or self.has_live_member(user)
+        if user.pk is None:
+            return False
+        return (user.pk == self.admin_id
+            or self.pk in EsusuGroup.get_member_group_pks(user.pk)
         )
 
     def has_watching_member(self, user):
-        try:
-            return user in self.future_tenure.watchers.all()
-        except ObjectDoesNotExist:
-            return False
+        return Watch.objects.filter(
+            tenure__esusu_group_id=self.pk, user_id=user.pk
+        ).exists()
 
     def has_live_member(self, user):
-        try:
-            return user in self.live_tenure.subscribers.all()
-        except ObjectDoesNotExist:
-            return False
+        return LiveSubscription.objects.filter(
+            tenure__esusu_group_id=self.pk, user_id=user.pk
+        ).exists()
 
 
 class LiveTenure(AbstractShrewdModelMixin, models.Model):
@@ -77,9 +145,46 @@ class LiveTenure(AbstractShrewdModelMixin, models.Model):
     live_at = models.DateTimeField(auto_now_add=True)
     previous_pay_date = models.DateField(null=True)
     next_pay_date = models.DateField(null=True)
+    balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='The amount collected on this tenure and not yet paid out.',
+        editable=False
+    )
+    total_collected = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='The amount collected on this tenure, all told.',
+        editable=False
+    )
+    total_paid_out = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='The amount paid out of this tenure, all told.',
+        editable=False
+    )
 
-    class Meta:
+    cache_responses = True
+
+    class Meta(AbstractShrewdModelMixin.Meta):
         ordering = ['-live_at', '-created_at']
+        indexes = [ShrewdIndex(fields=['-live_at', '-created_at'])]
+
+    @staticmethod
+    def record_collections(amounts):
+        '''
+        add the passed amounts, keyed by live tenure pk, to the balance
+        and to the total collected of their live tenures.
+        '''
+        for pk in sorted(amounts):
+            LiveTenure.objects.filter(pk=pk).update(
+                balance=models.F('balance') + amounts[pk],
+                total_collected=models.F('total_collected') + amounts[pk],
+                updated_at=timezone.now()
+            )
 
 
 class HistoricalTenure(AbstractShrewdModelMixin, models.Model):
@@ -100,18 +205,35 @@ class HistoricalTenure(AbstractShrewdModelMixin, models.Model):
         related_name='historical_tenures'
     )
     live_at = models.DateTimeField()
+    live_tenure_id = models.PositiveIntegerField(
+        null=True,
+        unique=True,
+        help_text='The pk this tenure had while it was live.',
+        editable=False
+    )
+    total_collected = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='The amount collected on this tenure while it was live.',
+        editable=False
+    )
+    total_paid_out = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        help_text='The amount paid out of this tenure while it was live.',
+        editable=False
+    )
+
+    cache_responses = True
 
-    class Meta:
+    class Meta(AbstractShrewdModelMixin.Meta):
         ordering = ['-live_at']
+        indexes = [ShrewdIndex(fields=['esusu_group', '-live_at'])]
 
 
 class FutureTenure(AbstractShrewdModelMixin, models.Model):
-    # the hash_id will be passed from the group to the tenure
-    hash_id = models.CharField(
-        primary_key=True,
-        max_length=64,
-        unique=True
-    )
     amount = models.DecimalField(
         max_digits=9,
         decimal_places=2,
@@ -130,11 +252,22 @@ class FutureTenure(AbstractShrewdModelMixin, models.Model):
     )
     will_go_live_at = models.DateTimeField(default=utils.two_weeks_from_now)
 
-    class Meta:
+    cache_responses = True
+
+    class Meta(AbstractShrewdModelMixin.Meta):
         ordering = ['-will_go_live_at', '-created_at']
+        # also serves the range scan for due future tenures
+        indexes = [ShrewdIndex(fields=['-will_go_live_at', '-created_at'])]
+
+    @property
+    def hash_id(self):
+        '''
+        the hash id of the owning group.
+        '''
+        return EsusuGroup.get_hash_id(self.esusu_group_id)
 
     def get_hash_id(self):
-        return self.esusu_group.hash_id
+        return self.hash_id
 
 
 class LiveSubscription(AbstractShrewdModelMixin, models.Model):
@@ -156,11 +289,17 @@ class LiveSubscription(AbstractShrewdModelMixin, models.Model):
     pay_date = models.DateField(null=True)
 
     def reset_next_charge_date(self):
-        self.next_charge_at = utils.seven_days_from_now()
+        self.next_charge_date = utils.seven_days_from_now().date()
         self.save()
 
-    class Meta:
+    class Meta(AbstractShrewdModelMixin.Meta):
         ordering = ['-created_at']
+        indexes = [
+            ShrewdIndex(fields=['tenure', '-created_at']),
+            # for the daily collection and pay out
+            ShrewdIndex(fields=['next_charge_date']),
+            ShrewdIndex(fields=['pay_date']),
+        ]
 
 
 class HistoricalSubscription(AbstractShrewdModelMixin, models.Model):
@@ -179,8 +318,9 @@ class HistoricalSubscription(AbstractShrewdModelMixin, models.Model):
         related_name='+'
     )
 
-    class Meta:
+    class Meta(AbstractShrewdModelMixin.Meta):
         ordering = ['-created_at']
+        indexes = [ShrewdIndex(fields=['tenure', '-created_at'])]
 
 
 class Watch(AbstractShrewdModelMixin, models.Model):
@@ -216,14 +356,22 @@ class Watch(AbstractShrewdModelMixin, models.Model):
         help_text='Indicates whether the user has opted to join the watched tenure when it eventually goes live'
     )
 
-    class Meta:
+    class Meta(AbstractShrewdModelMixin.Meta):
         ordering = ['-created_at']
         unique_together = ['tenure', 'user']
+        indexes = [ShrewdIndex(fields=['tenure', '-created_at'])]
 
 
 class Contribution(AbstractShrewdModelMixin, models.Model):
     '''
     Model implementing a weekly contribution of an amount to a live tenure.
+
+    When the live tenure is dissolved, its contributions are moved over
+    to the historical tenure it leaves behind.
+
+    On PostgreSQL, contributions are stored partitioned by the month they
+    were made in (see `tenures.partitions`), so reads and writes of recent
+    contributions only touch the partitions of recent months.
     '''
     amount = models.DecimalField(
         max_digits=9,
@@ -233,11 +381,178 @@ class Contribution(AbstractShrewdModelMixin, models.Model):
     )
     tenure = models.ForeignKey(
         LiveTenure,
+        null=True,
         on_delete=models.PROTECT,
         related_name='contributions'
     )
+    historical_tenure = models.ForeignKey(
+        HistoricalTenure,
+        null=True,
+        on_delete=models.PROTECT,
+        related_name='contributions',
+        help_text='The tenure this contribution was made to, once it is dissolved.'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.PROTECT,
+        related_name='+'
+    )
+
+    class Meta(AbstractShrewdModelMixin.Meta):
+        # contributions are read off as per tenure and per user ledgers
+        indexes = [
+            ShrewdIndex(fields=['tenure', 'created_at']),
+            ShrewdIndex(fields=['user', 'created_at']),
+        ]
+
+
+class ArchivedContributor(AbstractShrewdModelMixin, models.Model):
+    '''
+    Model recording that a user has contributions to a historical tenure
+    archived out of the database (see `tenures.archive`), so that the
+    archives holding the ledger of a user are looked up directly.
+    '''
+    historical_tenure = models.ForeignKey(
+        HistoricalTenure,
+        on_delete=models.PROTECT,
+        related_name='archived_contributors'
+    )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.PROTECT,
         related_name='+'
     )
+
+    class Meta(AbstractShrewdModelMixin.Meta):
+        ordering = ['-created_at']
+        unique_together = ['historical_tenure', 'user']
+
+
+class CollectionRun(AbstractShrewdModelMixin, models.Model):
+    '''
+    Model summarising a run of the collection of weekly contributions,
+    whose due subscriptions are charged in shards by separate workers.
+    '''
+    charge_date = models.DateField()
+    shards = models.PositiveIntegerField(default=0)
+    pending_shards = models.PositiveIntegerField(default=0)
+    collected = models.PositiveIntegerField(
+        default=0,
+        help_text='The number of contributions collected on this run.'
+    )
+    failed = models.PositiveIntegerField(
+        default=0,
+        help_text='The number of due subscriptions that could not be charged on this run.'
+    )
+    failed_shards = models.PositiveIntegerField(
+        default=0,
+        help_text='The number of shards of this run that died before recording their outcome.'
+    )
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta(AbstractShrewdModelMixin.Meta):
+        ordering = ['-created_at']
+
+    def is_finished(self):
+        return self.finished_at is not None
+
+    def get_progress(self):
+        '''
+        return the number of entries on this run in each status.
+        '''
+        counts = dict.fromkeys(
+            (status for status, _ in CollectionEntry.STATUS_OPTIONS), 0
+        )
+        counts.update(
+            self.entries.order_by().values('status')
+            .annotate(count=models.Count('pk')).values_list('status', 'count')
+        )
+        return counts
+
+
+class CollectionEntry(AbstractShrewdModelMixin, models.Model):
+    '''
+    Model implementing an entry in the ledger of collection runs.
+
+    A subscription is claimed for charging on a charge date by entering it
+    in the ledger, before it is charged. There can only be one entry per
+    subscription and charge date, so no matter how many runs (or shards)
+    go over a subscription on a day, it is only ever charged once.
+    An entry whose charge failed is claimed again by the next run.
+    '''
+    CLAIMED = 'Claimed'
+    CHARGED = 'Charged'
+    FAILED = 'Failed'
+
+    STATUS_OPTIONS = (
+        (CLAIMED, CLAIMED),
+        (CHARGED, CHARGED),
+        (FAILED, FAILED)
+    )
+
+    run = models.ForeignKey(
+        CollectionRun,
+        on_delete=models.PROTECT,
+        related_name='entries'
+    )
+    subscription = models.ForeignKey(
+        LiveSubscription,
+        on_delete=models.CASCADE,
+        related_name='collection_entries'
+    )
+    charge_date = models.DateField()
+    status = models.CharField(
+        default=CLAIMED,
+        max_length=16,
+        choices=STATUS_OPTIONS,
+        help_text='How the charge went. Entries left claimed by a run that died may or may not have been charged.'
+    )
+
+    class Meta(AbstractShrewdModelMixin.Meta):
+        ordering = ['-created_at']
+        unique_together = ['subscription', 'charge_date']
+
+
+class PayoutEntry(AbstractShrewdModelMixin, models.Model):
+    '''
+    Model implementing an entry in the ledger of pay outs.
+
+    A live tenure is claimed for paying out on a pay date by entering it
+    in the ledger, before its subscriber is credited. There can only be
+    one entry per live tenure and pay date, so no matter how many pay out
+    runs go over a tenure, it is only ever paid out once on a pay date.
+    Entries claimed together share a claim, and an entry whose credit
+    failed is claimed again by the next run.
+    '''
+    CLAIMED = 'Claimed'
+    PAID = 'Paid'
+    FAILED = 'Failed'
+
+    STATUS_OPTIONS = (
+        (CLAIMED, CLAIMED),
+        (PAID, PAID),
+        (FAILED, FAILED)
+    )
+
+    tenure = models.ForeignKey(
+        LiveTenure,
+        on_delete=models.CASCADE,
+        related_name='payout_entries'
+    )
+    subscription = models.ForeignKey(
+        LiveSubscription,
+        on_delete=models.CASCADE,
+        related_name='payout_entries'
+    )
+    pay_date = models.DateField()
+    claim = models.UUIDField()
+    status = models.CharField(
+        default=CLAIMED,
+        max_length=16,
+        choices=STATUS_OPTIONS,
+        help_text='How the credit went. Entries left claimed by a run that died, or by a credit of unknown outcome, may or may not have been paid.'
+    )
+
+    class Meta(AbstractShrewdModelMixin.Meta):
+        ordering = ['-created_at']
+        unique_together = ['tenure', 'pay_date']
@@ -0,0 +1,142 @@
+from datetime import date, datetime
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+
+
+# the contribution ledger is partitioned by the month of `created_at`
+CONTRIBUTION_TABLE = 'tenures_contribution'
+# months of partitions kept ready beyond the current one
+PARTITIONS_AHEAD = 2
+
+
+def get_month(day):
+    '''
+    return the first day of the month of the passed date (or datetime).
+    '''
+    if isinstance(day, datetime):
+        day = day.astimezone(timezone.utc).date()
+    return day.replace(day=1)
+
+def add_months(month, months):
+    years, month_index = divmod(month.month - 1 + months, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+def get_partition_name(table, month):
+    return '{}_p{:%Y%m}'.format(table, month)
+
+def get_default_partition_name(table):
+    return '{}_default'.format(table)
+
+def get_partition_bounds(month):
+    '''
+    return the (inclusive) start and (exclusive) end of the partition
+    for the passed month, as datetimes in UTC.
+    '''
+    return tuple(
+        datetime(m.year, m.month, 1, tzinfo=timezone.utc)
+        for m in (month, add_months(month, 1))
+    )
+
+def supports_partitioning(connection):
+    '''
+    return whether the passed connection is to a database with native
+    (declarative) partitioning that takes primary and foreign keys.
+    '''
+    return connection.vendor == 'postgresql' and connection.pg_version >= 110000
+
+def is_partitioned(connection, table=CONTRIBUTION_TABLE):
+    if not supports_partitioning(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = to_regclass(%s))', [table]
+        )
+        return cursor.fetchone()[0]
+
+def get_partitions(connection, table=CONTRIBUTION_TABLE):
+    '''
+    return the names of the partitions attached to the passed table.
+    '''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s) ORDER BY c.relname', [table]
+        )
+        return [name for name, in cursor.fetchall()]
+
+def create_partition(connection, table, month):
+    '''
+    Create the partition of the passed table for the passed month,
+    moving into it the rows of the month caught by the default partition.
+
+    The partition is filled before it is attached, so that attaching
+    it only has to check the rows of the month, and not lock out
+    writes to the table while they are copied.
+    '''
+    qn = connection.ops.quote_name
+    name = get_partition_name(table, month)
+    start, end = get_partition_bounds(month)
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute('CREATE TABLE {} (LIKE {} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'.format(
+            qn(name), qn(table)
+        ))
+        cursor.execute(
+            'WITH moved AS (DELETE FROM {} WHERE created_at >= %s AND created_at < %s '
+            'RETURNING *) INSERT INTO {} SELECT * FROM moved'.format(
+                qn(get_default_partition_name(table)), qn(name)
+            ), [start, end]
+        )
+        cursor.execute('ALTER TABLE {} ATTACH PARTITION {} FOR VALUES FROM (%s) TO (%s)'.format(
+            qn(table), qn(name)
+        ), [start, end])
+    return name
+
+def create_contribution_partitions(months_ahead=PARTITIONS_AHEAD, using=DEFAULT_DB_ALIAS):
+    '''
+    Make sure the contribution ledger has partitions for the current
+    month and the `months_ahead` months after it, so that contributions
+    never land in its default partition.
+
+    Return the names of the partitions created, which are none where
+    the ledger is not partitioned.
+    '''
+    connection = connections[using]
+    if not is_partitioned(connection):
+        return []
+    existing = set(get_partitions(connection))
+    this_month = get_month(timezone.now())
+    return [
+        create_partition(connection, CONTRIBUTION_TABLE, month)
+        for month in (add_months(this_month, i) for i in range(months_ahead + 1))
+        if get_partition_name(CONTRIBUTION_TABLE, month) not in existing
+    ]
+
+def detach_contribution_partitions(before, using=DEFAULT_DB_ALIAS):
+    '''
+    Detach the partitions of the contribution ledger for the months
+    before the month of the passed date, and return their names.
+
+    Detaching only touches the catalog. The detached partitions are left
+    as standalone tables to be archived or dropped, and their rows are no
+    longer seen through the ORM, so only months whose tenures have all
+    been dissolved (and archived) should be detached.
+    '''
+    connection = connections[using]
+    if not is_partitioned(connection):
+        return []
+    qn = connection.ops.quote_name
+    cutoff = get_partition_name(CONTRIBUTION_TABLE, get_month(before))
+    default = get_default_partition_name(CONTRIBUTION_TABLE)
+    detached = [
+        name for name in get_partitions(connection)
+        if name != default and name < cutoff
+    ]
+    with connection.cursor() as cursor:
+        for name in detached:
+            cursor.execute('ALTER TABLE {} DETACH PARTITION {}'.format(
+                qn(CONTRIBUTION_TABLE), qn(name)
+            ))
+    return detached
@@ -1,22 +1,21 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import EsusuGroup, FutureTenure
+from .models import Contribution, EsusuGroup, LiveSubscription, LiveTenure, Watch
 
 
-@receiver(post_save, sender=EsusuGroup)
-def assign_hash_id(sender, instance, created, **kwargs):
+@receiver([post_save, post_delete], sender=Watch)
+@receiver([post_save, post_delete], sender=LiveSubscription)
+def forget_memberships_of_user(sender, instance, **kwargs):
     '''
-    Assign hash id to the created instance using its product key as seed.
+    Forget the cached group memberships of the user on the instance.
     '''
-    if not created:
-        return
-    instance.hash_id = EsusuGroup.get_hash_id(instance.pk)
-    instance.save()
+    EsusuGroup.forget_member_group_pks(instance.user_id)
 
-@receiver(pre_save, sender=FutureTenure)
-def take_hash_id_from_owning_group(sender, instance, **kwargs):
+@receiver(post_save, sender=Contribution)
+def record_collection_on_tenure(sender, instance, created, **kwargs):
     '''
-    Assign hash id from owning group to the instance.
+    Add the amount of a newly created contribution to its live tenure.
     '''
-    instance.hash_id = instance.esusu_group.hash_id
+    if created:
+        LiveTenure.record_collections({instance.tenure_id: instance.amount})
@@ -1,68 +1,663 @@
+import heapq
 import random
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from operator import itemgetter
 
+import dramatiq
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Q, Subquery, Sum
 from django.utils import timezone
 
+from . import archive, partitions, utils
 from .models import (
-    FutureTenure, LiveTenure,
-    Watch, LiveSubscription,
-    Contribution
+    EsusuGroup,
+    FutureTenure, LiveTenure, HistoricalTenure,
+    Watch, LiveSubscription, HistoricalSubscription,
+    Contribution, CollectionRun, CollectionEntry, PayoutEntry
 )
-from payments.tasks import charge_user, credit_user
+from payments.tasks import charge_users, credit_users
 
 
 def reset_watches_on_updated_future_tenure(ft_pk):
     Watch.objects.filter(tenure__pk=ft_pk).update(
-        status=Watch.TO_REVIEW_UPDATE
+        status=Watch.TO_REVIEW_UPDATE, updated_at=timezone.now()
     )
 
+def _promote_future_tenures(fts):
+    '''
+    Promote the argument Future Tenures to Live Tenures.
+
+    The opted-in watches of all the future tenures are read with a single
+    query, and the live subscriptions created from them are written with
+    a single bulk insert.
+    '''
+    now = timezone.now()
+    opted_in_user_pks = defaultdict(list)
+    for tenure_pk, user_pk in Watch.objects.filter(
+            tenure__in=fts, status=Watch.OPTED_IN
+            ).order_by('created_at').values_list('tenure_id', 'user_id'):
+        opted_in_user_pks[tenure_pk].append(user_pk)
+
+    subscriptions = []
+    for ft in fts:
+        # create live tenure
+        lt = LiveTenure.objects.create(
+            amount=ft.amount, esusu_group_id=ft.esusu_group_id,
+            previous_pay_date=now.date(),
+            next_pay_date=(now + timezone.timedelta(30)).date()
+        )
+        # populate live tenure with live subscriptions created from
+        # watches that have opted into promoted future tenure
+        # creation of live subscriptions should be random
+        user_pks = opted_in_user_pks[ft.pk]
+        random.shuffle(user_pks)
+        # and pay dates should be 30 days from each other
+        subscriptions.extend(
+            LiveSubscription(
+                tenure=lt, user_id=user_pk,
+                pay_date=(now + timezone.timedelta(30 * i)).date()
+            )
+            for i, user_pk in enumerate(user_pks, start=1)
+        )
+    LiveSubscription.objects.bulk_create(subscriptions)
+    # bulk creation sends no signals
+    EsusuGroup.forget_member_group_pks(*{ls.user_id for ls in subscriptions})
+
+    # delete future tenures
+    # and associated watches
+    ft_pks = [ft.pk for ft in fts]
+    Watch.objects.filter(tenure__in=ft_pks).delete(hard=True)
+    FutureTenure.objects.filter(pk__in=ft_pks).delete(hard=True)
+
 def promote_future_tenure(ft_pk):
     '''
     Promote a Future Tenure to a Live Tenure.
     '''
-    ft = FutureTenure.objects.get(pk=ft_pk)
+    with transaction.atomic():
+        ft = FutureTenure.objects.select_for_update().get(pk=ft_pk)
+        _promote_future_tenures([ft])
 
-    # create live tenure
-    now = timezone.now()
-    lt = LiveTenure.objects.create(
-        amount=ft.amount, esusu_group=ft.esusu_group,
-        previous_pay_date=now.date(),
-        next_pay_date=(now + timezone.timedelta(30)).date()
-    )
-    # populate live tenure with live subscriptions created from
-    # watches that have opted into promoted future tenure
-    # creation of live subscriptions should be random
-    watches = list(Watch.objects.filter(tenure=ft, status=Watch.OPTED_IN))
-    random.shuffle(watches)
-    # and pay dates should be 30 days from each other
-    pay_at = now
-    for watch in watches:
-        pay_at += timezone.timedelta(30)
-        LiveSubscription.objects.create(
-            tenure=lt, user=watch.user, pay_date=pay_at.date()
+def get_due_future_tenures():
+    '''
+    Return the Future Tenures whose go-live time has passed,
+    on groups that have no Live Tenure yet.
+    '''
+    return FutureTenure.objects.filter(
+        will_go_live_at__lte=timezone.now(),
+        esusu_group__live_tenure__isnull=True
+    )
+
+def promote_due_future_tenures(limit=None):
+    '''
+    Promote every Future Tenure whose go-live time has passed
+    (or the `limit` earliest of them), in a single transaction.
+
+    The future tenures are locked as they are read, and those locked by
+    another sweep are skipped, so that sweeps running at once share the
+    work instead of promoting the same tenures twice.
+    Return the number of future tenures promoted.
+    '''
+    with transaction.atomic():
+        fts = list(
+            get_due_future_tenures().select_for_update(skip_locked=True, of=('self',))
+            .order_by('will_go_live_at')[:limit]
         )
+        _promote_future_tenures(fts)
+    return len(fts)
 
-    # delete future tenure
-    # and associated watches
-    Watch.objects.filter(tenure=ft).delete(hard=True)
-    ft.delete(hard=True)
+PROMOTION_BATCH_SIZE = 100
 
-def _collect_contribution_from_subscription(ls):
+@dramatiq.actor
+def sweep_due_future_tenures(batch_size=PROMOTION_BATCH_SIZE):
+    '''
+    Promote every due Future Tenure in batches of `batch_size`,
+    each batch in its own transaction.
+
+    Return the number of future tenures promoted.
+    '''
+    promoted = 0
+    while True:
+        batch = promote_due_future_tenures(limit=batch_size)
+        promoted += batch
+        if batch < batch_size:
+            return promoted
+
+COLLECTION_CHUNK_SIZE = 500
+
+def _claim_subscriptions(subscriptions, run):
+    '''
+    Enter the argument subscriptions in the ledger under the argument run,
+    and return the ones the run got to claim: those that no other run had
+    already entered for the same charge date, and those whose charge had
+    failed on an earlier run, which are claimed again with a conditional
+    update so that only one run gets to retry them.
+    '''
+    CollectionEntry.objects.bulk_create((
+        CollectionEntry(run_id=run.pk, subscription_id=ls.pk, charge_date=run.charge_date)
+        for ls in subscriptions
+    ), ignore_conflicts=True)
+    CollectionEntry.objects.filter(
+        subscription_id__in=[ls.pk for ls in subscriptions],
+        charge_date=run.charge_date, status=CollectionEntry.FAILED
+    ).update(status=CollectionEntry.CLAIMED, run_id=run.pk, updated_at=timezone.now())
+    claimed = set(
+        CollectionEntry.objects.filter(
+            run_id=run.pk, subscription_id__in=[ls.pk for ls in subscriptions]
+        ).values_list('subscription_id', flat=True)
+    )
+    return [ls for ls in subscriptions if ls.pk in claimed]
+
+def _collect_contributions_from_subscriptions(subscriptions, run):
     '''
     Charge the appropriate amount due weekly on the appropriate live tenure
-    to the subscribed user, and create contribution object as a receipt of this.
+    to each subscribed user, and create contribution objects as receipts.
+
+    The argument subscriptions are expected to have their tenures
+    selected along with them. They are first claimed in the ledger under
+    the argument run, and only the ones claimed are charged.
+    Contributions for the successful charges are created with a single
+    bulk insert, the balances of their tenures are topped up with an update
+    per tenure, their subscriptions have their next charge dates moved
+    forward with a single update, and their ledger entries are marked
+    with an update per (known) outcome.
     '''
-    alert = charge_user(user_pk=ls.user.pk, amount=ls.tenure.amount)
-    if alert.is_success():
-        ls.reset_next_charge_date()
-        Contribution.objects.create(amount=ls.tenure.amount, tenure=ls.tenure, user=ls.user)
-    return alert
+    subscriptions = _claim_subscriptions(subscriptions, run)
+    alerts = charge_users(
+        (ls.user_id, ls.tenure.amount) for ls in subscriptions
+    )
+    charged = [
+        ls for ls, alert in zip(subscriptions, alerts) if alert.is_success()
+    ]
+    amounts = defaultdict(Decimal)
+    for ls in charged:
+        amounts[ls.tenure_id] += ls.tenure.amount
+    charged_pks = {ls.pk for ls in charged}
 
-def collect_due_weekly_contributions():
+    now = timezone.now()
+    with transaction.atomic():
+        Contribution.objects.bulk_create(
+            Contribution(amount=ls.tenure.amount, tenure_id=ls.tenure_id, user_id=ls.user_id)
+            for ls in charged
+        )
+        LiveTenure.record_collections(amounts)
+        LiveSubscription.objects.filter(pk__in=charged_pks).update(
+            next_charge_date=utils.seven_days_from_now().date(),
+            updated_at=now
+        )
+        CollectionEntry.objects.filter(
+            run_id=run.pk, subscription_id__in=charged_pks
+        ).update(status=CollectionEntry.CHARGED, updated_at=now)
+        # charges of unknown outcome are left claimed, to be resolved
+        CollectionEntry.objects.filter(run_id=run.pk, subscription_id__in=[
+            ls.pk for ls, alert in zip(subscriptions, alerts) if alert.is_failure()
+        ]).update(status=CollectionEntry.FAILED, updated_at=now)
+    return alerts
+
+def get_due_subscriptions(charge_date=None):
     '''
-    Collect contributions that are due today.
+    Return the Live Subscriptions whose weekly contribution is due on the
+    argument charge date (today by default), and which no collection run
+    has entered in the ledger for that date (other than as failed), found
+    with a single anti-join.
     '''
-    qs = LiveSubscription.objects.filter(next_charge_date=timezone.now().date())
-    for lsub in qs:
-        _collect_contribution_from_subscription(lsub)
+    charge_date = charge_date or timezone.now().date()
+    return LiveSubscription.objects.filter(
+        ~Exists(CollectionEntry.objects.filter(
+            subscription=OuterRef('pk'), charge_date=charge_date
+        ).exclude(status=CollectionEntry.FAILED)),
+        next_charge_date=charge_date
+    )
+
+# claims older than this are taken as left behind, even on unfinished runs
+STALE_CLAIM_AFTER = timezone.timedelta(hours=1)
+
+def get_stale_claims(after=STALE_CLAIM_AFTER):
+    '''
+    Return the ledger entries left claimed by a finished collection run,
+    or claimed more than `after` ago: those of charges of unknown outcome,
+    and of shards (or runs) that died.
+
+    They may or may not have been charged, so they are not charged again
+    until they are resolved, by checking with the card provider.
+    '''
+    return CollectionEntry.objects.filter(
+        Q(run__finished_at__isnull=False) | Q(updated_at__lt=timezone.now() - after),
+        status=CollectionEntry.CLAIMED
+    )
+
+def release_stale_claims(entry_pks):
+    '''
+    Mark the argument stale claims as failed (once it is known that
+    they were not charged), so that the next collection run on their
+    charge date claims them again. Return the number released.
+    '''
+    return get_stale_claims().filter(pk__in=entry_pks).update(
+        status=CollectionEntry.FAILED, updated_at=timezone.now()
+    )
+
+def _record_collection_on_run(run_pk, alerts, **kwargs):
+    '''
+    Add the outcome of the argument alerts to the argument collection run.
+    '''
+    collected = sum(1 for alert in alerts if alert.is_success())
+    failed = sum(1 for alert in alerts if alert.is_failure())
+    CollectionRun.objects.filter(pk=run_pk).update(
+        collected=F('collected') + collected,
+        failed=F('failed') + failed,
+        updated_at=timezone.now(),
+        **kwargs
+    )
+    return collected
+
+def collect_due_weekly_contributions(chunk_size=COLLECTION_CHUNK_SIZE):
+    '''
+    Collect contributions that are due today, on a new collection run.
+
+    Due subscriptions are walked in chunks of `chunk_size` ordered by pk,
+    so that each chunk costs a constant number of queries no matter
+    how many subscriptions are in it. Subscriptions entered in the ledger
+    by an earlier (or concurrent) run are skipped, unless their charge
+    failed, so this can be run again after a crash without charging
+    anyone twice.
+    Return the number of contributions collected.
+    '''
+    run = CollectionRun.objects.create(charge_date=timezone.now().date())
+    qs = get_due_subscriptions(run.charge_date).select_related('tenure')
+
+    collected = 0
+    for chunk in qs.iter_batches(chunk_size):
+        alerts = _collect_contributions_from_subscriptions(chunk, run)
+        collected += _record_collection_on_run(run.pk, alerts)
+    finish_collection_run(run.pk)
+    return collected
 
 collect_due_contributions = collect_due_weekly_contributions
+
+PAYOUT_CHUNK_SIZE = 500
+
+def _claim_payouts(subscriptions):
+    '''
+    Enter the live tenures of the argument subscriptions in the payout
+    ledger for their pay dates under a new claim, and return the
+    subscriptions that got claimed, along with the pks of their entries
+    by subscription pk. Claimed are those whose tenure no other run had
+    already entered for the pay date, and those whose credit had failed
+    on an earlier run, which are claimed again with a conditional update
+    so that only one run gets to retry them.
+    '''
+    claim = uuid.uuid4()
+    PayoutEntry.objects.bulk_create((
+        PayoutEntry(
+            tenure_id=ls.tenure_id, subscription_id=ls.pk,
+            pay_date=ls.pay_date, claim=claim
+        ) for ls in subscriptions
+    ), ignore_conflicts=True)
+    PayoutEntry.objects.filter(
+        subscription_id__in=[ls.pk for ls in subscriptions],
+        status=PayoutEntry.FAILED
+    ).update(status=PayoutEntry.CLAIMED, claim=claim, updated_at=timezone.now())
+    claimed = dict(
+        PayoutEntry.objects.filter(claim=claim).values_list('subscription_id', 'pk')
+    )
+    return [ls for ls in subscriptions if ls.pk in claimed], claimed
+
+def _pay_out_to_subscriptions(subscriptions):
+    '''
+    Credit each subscribed user with the pot of their live tenure, and move
+    the pay dates of the live tenures of the successful credits forward.
+
+    The argument subscriptions are expected to have their tenures selected
+    along with them, and to be due on their tenures' next pay date.
+    They are first claimed in the payout ledger, and only the ones claimed
+    are credited. The pot of a live tenure is its balance, the amount
+    collected on it since it was last paid out, which is debited by the
+    amount credited. Credits of unknown outcome are not taken as paid,
+    and their entries are left claimed, so that they are not credited
+    again until they are resolved.
+    '''
+    subscriptions, entry_pks = _claim_payouts(subscriptions)
+    alerts = credit_users(
+        (ls.user_id, ls.tenure.balance) for ls in subscriptions
+    )
+
+    now = timezone.now()
+    paid = []
+    for ls, alert in zip(subscriptions, alerts):
+        if not alert.is_success():
+            continue
+        lt = ls.tenure
+        lt.previous_pay_date = lt.next_pay_date
+        lt.next_pay_date = lt.next_pay_date + timezone.timedelta(30)
+        # collections recorded in the meantime are kept in the balance
+        lt.balance = F('balance') - alert.amount
+        lt.total_paid_out = F('total_paid_out') + alert.amount
+        lt.updated_at = now
+        paid.append(lt)
+    with transaction.atomic():
+        LiveTenure.objects.bulk_update(paid, [
+            'previous_pay_date', 'next_pay_date',
+            'balance', 'total_paid_out', 'updated_at'
+        ])
+        PayoutEntry.objects.filter(pk__in=[
+            entry_pks[ls.pk] for ls, alert in zip(subscriptions, alerts) if alert.is_success()
+        ]).update(status=PayoutEntry.PAID, updated_at=now)
+        # credits of unknown outcome are left claimed, to be resolved
+        PayoutEntry.objects.filter(pk__in=[
+            entry_pks[ls.pk] for ls, alert in zip(subscriptions, alerts) if alert.is_failure()
+        ]).update(status=PayoutEntry.FAILED, updated_at=now)
+    return alerts
+
+def get_payable_subscriptions():
+    '''
+    Return the Live Subscriptions whose pay date has come, is the next
+    pay date of their live tenure, and which no pay out run has entered
+    in the ledger for that date (other than as failed).
+    '''
+    return LiveSubscription.objects.filter(
+        ~Exists(PayoutEntry.objects.filter(
+            tenure=OuterRef('tenure_id'), pay_date=OuterRef('pay_date')
+        ).exclude(status=PayoutEntry.FAILED)),
+        pay_date__lte=timezone.now().date(),
+        pay_date=F('tenure__next_pay_date')
+    )
+
+def get_stale_payout_claims(after=STALE_CLAIM_AFTER):
+    '''
+    Return the payout ledger entries left claimed for more than `after`:
+    those of credits of unknown outcome, and of runs that died.
+
+    They may or may not have been paid, so they are not credited again
+    until they are resolved, by checking with the card provider.
+    '''
+    return PayoutEntry.objects.filter(
+        updated_at__lt=timezone.now() - after,
+        status=PayoutEntry.CLAIMED
+    )
+
+def release_stale_payout_claims(entry_pks):
+    '''
+    Mark the argument stale payout claims as failed (once it is known
+    that they were not paid), so that the next pay out run claims them
+    again. Return the number released.
+    '''
+    return get_stale_payout_claims().filter(pk__in=entry_pks).update(
+        status=PayoutEntry.FAILED, updated_at=timezone.now()
+    )
+
+def pay_out_due_subscriptions(chunk_size=PAYOUT_CHUNK_SIZE):
+    '''
+    Credit the subscribers whose pay date has come
+    with the pots of their live tenures.
+
+    A subscription is due for pay out when its pay date is today (or
+    has passed) and is the next pay date of its live tenure, and its
+    tenure is claimed in the payout ledger before it is credited, so a
+    live tenure is paid out at most once per pay date no matter how many
+    times (or how many runs at once) this runs, even when a credit's
+    outcome is unknown. It should run after the day's collection.
+    Return the number of subscribers credited.
+    '''
+    qs = get_payable_subscriptions().select_related('tenure')
+
+    credited = 0
+    for chunk in qs.iter_batches(chunk_size):
+        alerts = _pay_out_to_subscriptions(chunk)
+        credited += sum(1 for alert in alerts if alert.is_success())
+    return credited
+
+def get_finished_live_tenures():
+    '''
+    Return the Live Tenures that have paid out to all their subscribers:
+    those with no subscription whose pay date is on or after their next
+    pay date, found with a single anti-join.
+    '''
+    return LiveTenure.objects.filter(
+        ~Exists(LiveSubscription.objects.filter(
+            tenure=OuterRef('pk'), pay_date__gte=OuterRef('next_pay_date')
+        )),
+        next_pay_date__isnull=False
+    )
+
+def _dissolve_live_tenures(lts):
+    '''
+    Move the argument Live Tenures into history, along with
+    their subscriptions and contributions.
+
+    However many tenures there are, their historical tenures are written
+    with a single bulk insert and read back with a single query, their
+    subscriptions are copied over with a single query and a single bulk
+    insert, their contributions are moved over with a single update, and
+    the live rows are deleted with a delete per model.
+    '''
+    lt_pks = [lt.pk for lt in lts]
+    HistoricalTenure.objects.bulk_create(
+        HistoricalTenure(
+            amount=lt.amount, esusu_group_id=lt.esusu_group_id,
+            live_at=lt.live_at, live_tenure_id=lt.pk,
+            total_collected=lt.total_collected, total_paid_out=lt.total_paid_out
+        ) for lt in lts
+    )
+    ht_pks = dict(
+        HistoricalTenure.objects.filter(live_tenure_id__in=lt_pks)
+        .values_list('live_tenure_id', 'pk')
+    )
+    HistoricalSubscription.objects.bulk_create(
+        HistoricalSubscription(tenure_id=ht_pks[tenure_pk], user_id=user_pk)
+        for tenure_pk, user_pk in LiveSubscription.objects.filter(
+            tenure__in=lt_pks
+        ).order_by('pay_date').values_list('tenure_id', 'user_id')
+    )
+    Contribution.all_objects.filter(tenure__in=lt_pks).update(
+        historical_tenure=Subquery(
+            HistoricalTenure.objects.filter(
+                live_tenure_id=OuterRef('tenure_id')
+            ).values('pk')
+        ),
+        tenure=None,
+        updated_at=timezone.now()
+    )
+
+    # the ledger entries of the subscriptions go along with them
+    LiveSubscription.all_objects.filter(tenure__in=lt_pks).delete(hard=True)
+    LiveTenure.all_objects.filter(pk__in=lt_pks).delete(hard=True)
+
+def dissolve_finished_live_tenures(limit=None):
+    '''
+    Dissolve every Live Tenure that has paid out to all its subscribers
+    (or the `limit` earliest of them), in a single transaction.
+
+    The tenures are locked while they are dissolved, so that no
+    contribution is collected on them in the meantime.
+    Return the number of live tenures dissolved.
+    '''
+    with transaction.atomic():
+        lts = list(
+            get_finished_live_tenures().select_for_update().order_by('pk')[:limit]
+        )
+        if lts:
+            _dissolve_live_tenures(lts)
+    return len(lts)
+
+DISSOLUTION_BATCH_SIZE = 100
+
+@dramatiq.actor
+def sweep_finished_live_tenures(batch_size=DISSOLUTION_BATCH_SIZE):
+    '''
+    Dissolve every finished Live Tenure in batches of `batch_size`,
+    each batch in its own transaction.
+
+    Return the number of live tenures dissolved.
+    '''
+    dissolved = 0
+    while True:
+        batch = dissolve_finished_live_tenures(limit=batch_size)
+        dissolved += batch
+        if batch < batch_size:
+            return dissolved
+
+def dispatch_due_weekly_contributions(shard_size=COLLECTION_CHUNK_SIZE):
+    '''
+    Fan the collection of contributions that are due today out to workers.
+
+    The due subscriptions are split into shards of `shard_size`, and each
+    shard is sent as a separate message so that charging scales across
+    worker processes. Return the collection run on which the workers
+    record the summary of the collection.
+    '''
+    today = timezone.now().date()
+    pks = list(get_due_subscriptions(today).order_by('pk').values_list('pk', flat=True))
+    shards = [pks[i:i + shard_size] for i in range(0, len(pks), shard_size)]
+    run = CollectionRun.objects.create(
+        charge_date=today, shards=len(shards), pending_shards=len(shards)
+    )
+
+    if not shards:
+        finish_collection_run(run.pk)
+    for shard in shards:
+        collect_contributions_shard.send(run.pk, shard)
+    return run
+
+# a failed shard is not retried, as it may have charged some of its users;
+# its claims stay in the ledger, to be resolved before they are charged again
+@dramatiq.actor(max_retries=0)
+def collect_contributions_shard(run_pk, subscription_pks):
+    '''
+    Collect contributions from the argument subscriptions (that are
+    still due on the charge date of the argument run), and record
+    the outcome on the run.
+
+    The shard is counted off the pending shards of the run even when
+    it dies, so that the run is still finished by its last shard.
+    '''
+    alerts, died = [], True
+    try:
+        run = CollectionRun.objects.get(pk=run_pk)
+        subscriptions = list(
+            LiveSubscription.objects.filter(
+                pk__in=subscription_pks, next_charge_date=run.charge_date
+            ).select_related('tenure').order_by('pk')
+        )
+        alerts = _collect_contributions_from_subscriptions(subscriptions, run)
+        died = False
+    finally:
+        _record_collection_on_run(
+            run_pk, alerts, pending_shards=F('pending_shards') - 1,
+            failed_shards=F('failed_shards') + int(died)
+        )
+        # the last shard to finish completes the run
+        if CollectionRun.objects.filter(pk=run_pk, pending_shards=0).exists():
+            finish_collection_run.send(run_pk)
+
+@dramatiq.actor
+def finish_collection_run(run_pk):
+    '''
+    Mark the argument collection run as finished, if it isn't already.
+    '''
+    CollectionRun.objects.filter(pk=run_pk, finished_at__isnull=True).update(
+        finished_at=timezone.now(), updated_at=timezone.now()
+    )
+
+
+CONTRIBUTION_LEDGER_FIELDS = ('id', 'tenure', 'historical_tenure', 'user', 'amount', 'created_at')
+LEDGER_CHUNK_SIZE = 2000
+
+def _iter_archived_ledger(ht_pk, user_pk=None):
+    for row in archive.iter_historical_ledger(ht_pk):
+        if row['deleted_at'] is None and user_pk in (None, row['user']):
+            yield {field: row.get(field) for field in CONTRIBUTION_LEDGER_FIELDS}
+
+def iter_contribution_ledger(tenure_pk=None, user_pk=None, historical_tenure_pk=None,
+                             chunk_size=LEDGER_CHUNK_SIZE):
+    '''
+    Yield the contributions to the argument (live or historical) tenure
+    and/or by the argument user, oldest first, as dicts of their ledger
+    fields. Contributions to a dissolved tenure are only found by the pk
+    of the historical tenure it left behind.
+
+    Rows are read off a server-side cursor (where the database has them)
+    a chunk at a time, and never materialized as a whole. The ledgers of
+    a historical tenure and of a user take in the contributions moved
+    out into the archive, merged in by date; the ledger as a whole is
+    only read off the database, and leaves them out.
+    '''
+    contributions = Contribution.objects.order_by('created_at')
+    if tenure_pk is not None:
+        contributions = contributions.filter(tenure_id=tenure_pk)
+    if historical_tenure_pk is not None:
+        contributions = contributions.filter(historical_tenure_id=historical_tenure_pk)
+    if user_pk is not None:
+        contributions = contributions.filter(user_id=user_pk)
+
+    archived_pks = []
+    if tenure_pk is None and (user_pk, historical_tenure_pk) != (None, None):
+        archived_pks = archive.get_archived_tenure_pks(user_pk, historical_tenure_pk)
+    if not archived_pks:
+        return contributions.values(
+            *CONTRIBUTION_LEDGER_FIELDS
+        ).iterator(chunk_size=chunk_size)
+
+    # the archived tenures are read whole off their archives, so that
+    # rows archived but not yet deleted are not read twice
+    rows = contributions.exclude(historical_tenure_id__in=archived_pks).values(
+        *CONTRIBUTION_LEDGER_FIELDS
+    ).iterator(chunk_size=chunk_size)
+    return heapq.merge(rows, *(
+        _iter_archived_ledger(ht_pk, user_pk) for ht_pk in archived_pks
+    ), key=itemgetter('created_at'))
+
+def reconcile_tenure_balances(fix=False):
+    '''
+    Recompute the total collected on each live tenure from its contributions,
+    with a single grouped aggregate, and return the drifts between those and
+    the recorded totals as (live tenure pk, recorded, recomputed) triples.
+
+    The balance of a live tenure should be its total collected less its total
+    paid out. With `fix`, the drifted totals and balances are overwritten, so
+    it should not run while contributions are being collected or paid out.
+    '''
+    collected = dict(
+        Contribution.objects.order_by().values('tenure_id')
+        .annotate(total=Sum('amount')).values_list('tenure_id', 'total')
+    )
+    drifts = []
+    for lt in LiveTenure.objects.only(
+        'balance', 'total_collected', 'total_paid_out'
+    ).order_by('pk').iterator():
+        total = collected.get(lt.pk, Decimal(0))
+        if lt.total_collected != total or lt.balance != total - lt.total_paid_out:
+            drifts.append((lt, total))
+
+    if fix:
+        LiveTenure.objects.bulk_update([
+            LiveTenure(
+                pk=lt.pk, total_collected=total, balance=total - lt.total_paid_out,
+                updated_at=timezone.now()
+            ) for lt, total in drifts
+        ], ['total_collected', 'balance', 'updated_at'])
+    return [(lt.pk, lt.total_collected, total) for lt, total in drifts]
+
+@dramatiq.actor
+def prepare_contribution_partitions(months_ahead=partitions.PARTITIONS_AHEAD):
+    '''
+    Create the partitions of the contribution ledger for the current
+    month and the `months_ahead` months after it, where missing.
+    It should run at least monthly.
+    '''
+    return partitions.create_contribution_partitions(months_ahead)
+
+@dramatiq.actor
+def archive_historical_contributions(after_days=archive.ARCHIVE_AFTER_DAYS,
+                                     batch_size=archive.ARCHIVE_BATCH_SIZE):
+    '''
+    Archive the contributions of the historical tenures dissolved more
+    than `after_days` days ago, a tenure at a time.
+
+    Return the number of contributions archived.
+    '''
+    archived = 0
+    for ht_pk in archive.get_archivable_tenures(after_days).order_by('pk').values_list(
+            'pk', flat=True):
+        archived += archive.archive_tenure_contributions(ht_pk, batch_size)
+    return archived
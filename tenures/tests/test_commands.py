@@ -0,0 +1,238 @@
+import csv
+import json
+import shutil
+import tempfile
+import uuid
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .. import tasks
+from ..models import (
+    CollectionEntry, CollectionRun, Contribution, EsusuGroup, FutureTenure,
+    HistoricalTenure, LiveTenure, PayoutEntry
+)
+
+
+class PromoteDueFutureTenuresCommandTest(TestCase):
+
+    def setUp(self):
+        mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        for i in range(5):
+            group = EsusuGroup.objects.create(name=f'Group {i}', admin=mfon)
+            FutureTenure.objects.create(esusu_group=group, amount=5000)
+        # all but one are due
+        FutureTenure.objects.exclude(esusu_group__name='Group 0').update(
+            will_go_live_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+
+    def test_promotes_due_future_tenures_in_batches(self):
+        out = StringIO()
+        call_command('promote_due_future_tenures', '--batch-size=3', stdout=out)
+
+        self.assertEqual(LiveTenure.objects.count(), 4)
+        self.assertEqual(FutureTenure.objects.count(), 1)
+        self.assertTrue(FutureTenure.objects.filter(esusu_group__name='Group 0').exists())
+        self.assertIn('Promoted 4 future tenure(s)', out.getvalue())
+
+
+class ExportContributionsCommandTest(TestCase):
+
+    def setUp(self):
+        self.mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        self.ambrose = get_user_model().objects.create_user(
+            email='ambrose@igibo.com', password='nopassword',
+            first_name='Ambrose', last_name='Igibo'
+        )
+        group = EsusuGroup.objects.create(name='Lifelong Savers', admin=self.mfon)
+        self.lt = LiveTenure.objects.create(esusu_group=group, amount=5000)
+        other_group = EsusuGroup.objects.create(name='Sad Pockets', admin=self.mfon)
+        other_lt = LiveTenure.objects.create(esusu_group=other_group, amount=2000)
+
+        for user in [self.mfon, self.ambrose]:
+            Contribution.objects.create(amount=5000, tenure=self.lt, user=user)
+        Contribution.objects.create(amount=2000, tenure=other_lt, user=self.mfon)
+
+    def test_exports_tenure_ledger_as_csv(self):
+        out = StringIO()
+        call_command(
+            'export_contributions', f'--tenure={self.lt.pk}', '--chunk-size=1', stdout=out
+        )
+
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(
+            [int(row['user']) for row in rows], [self.mfon.pk, self.ambrose.pk]
+        )
+        self.assertEqual({row['amount'] for row in rows}, {'5000.00'})
+
+    def test_exports_user_ledger_as_ndjson(self):
+        out = StringIO()
+        call_command(
+            'export_contributions', f'--user={self.mfon.pk}', '--format=ndjson', stdout=out
+        )
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['user'] for row in rows}, {self.mfon.pk})
+
+
+    def test_exports_historical_tenure_ledger_after_dissolution(self):
+        tasks._dissolve_live_tenures([self.lt])
+        ht = HistoricalTenure.objects.get(live_tenure_id=self.lt.pk)
+
+        out = StringIO()
+        call_command('export_contributions', f'--historical-tenure={ht.pk}', stdout=out)
+
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({int(row['historical_tenure']) for row in rows}, {ht.pk})
+        self.assertEqual({row['tenure'] for row in rows}, {''})
+
+
+class ReconcileTenureBalancesCommandTest(TestCase):
+
+    def setUp(self):
+        mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        group = EsusuGroup.objects.create(name='Lifelong Savers', admin=mfon)
+        self.lt = LiveTenure.objects.create(esusu_group=group, amount=5000)
+        Contribution.objects.create(amount=5000, tenure=self.lt, user=mfon)
+        # a contribution whose tenure was never told of it
+        Contribution.objects.bulk_create([
+            Contribution(amount=5000, tenure=self.lt, user=mfon)
+        ])
+
+    def test_reports_drift(self):
+        out = StringIO()
+        call_command('reconcile_tenure_balances', stdout=out)
+
+        self.assertIn(f'Live tenure {self.lt.pk} recorded 5000.00 collected', out.getvalue())
+        self.assertIn('1 live tenure(s) drifted.', out.getvalue())
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.balance, 5000)
+
+    def test_fixes_drift(self):
+        out = StringIO()
+        call_command('reconcile_tenure_balances', '--fix', stdout=out)
+
+        self.assertIn('1 live tenure(s) drifted and were fixed.', out.getvalue())
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.balance, 10000)
+
+
+class DissolveFinishedLiveTenuresCommandTest(TestCase):
+
+    def setUp(self):
+        mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        today = timezone.now().date()
+        for i in range(5):
+            group = EsusuGroup.objects.create(name=f'Group {i}', admin=mfon)
+            LiveTenure.objects.create(
+                esusu_group=group, amount=5000,
+                previous_pay_date=today - timezone.timedelta(30), next_pay_date=today
+            )
+        # all but one have paid out to all (none) of their subscribers
+        LiveTenure.objects.get(esusu_group__name='Group 0').subscriptions.create(
+            user=mfon, pay_date=today
+        )
+
+    def test_dissolves_finished_live_tenures_in_batches(self):
+        out = StringIO()
+        call_command('dissolve_finished_live_tenures', '--batch-size=3', stdout=out)
+
+        self.assertEqual(HistoricalTenure.objects.count(), 4)
+        self.assertEqual(LiveTenure.objects.get().esusu_group.name, 'Group 0')
+        self.assertIn('Dissolved 4 live tenure(s)', out.getvalue())
+
+
+class ArchiveContributionsCommandTest(TestCase):
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        group = EsusuGroup.objects.create(name='Lifelong Savers', admin=mfon)
+        ht = HistoricalTenure.objects.create(amount=5000, esusu_group=group, live_at=timezone.now())
+        for _ in range(2):
+            Contribution.objects.create(amount=5000, historical_tenure=ht, user=mfon)
+
+    def test_archives_contributions_of_dissolved_tenures(self):
+        out = StringIO()
+        with override_settings(CONTRIBUTION_ARCHIVE_DIR=self.archive_dir):
+            call_command('archive_contributions', '--after-days=0', stdout=out)
+
+        self.assertFalse(Contribution.all_objects.exists())
+        self.assertIn('Archived 2 contribution(s)', out.getvalue())
+
+
+class ResolveStaleClaimsCommandTest(TestCase):
+
+    def setUp(self):
+        mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        group = EsusuGroup.objects.create(name='Lifelong Savers', admin=mfon)
+        lt = LiveTenure.objects.create(esusu_group=group, amount=5000)
+        subscription = lt.subscriptions.create(user=mfon, pay_date=timezone.now().date())
+        run = CollectionRun.objects.create(
+            charge_date=timezone.now().date(), finished_at=timezone.now()
+        )
+        self.entry = CollectionEntry.objects.create(
+            run=run, subscription=subscription, charge_date=run.charge_date
+        )
+
+    def test_lists_stale_claims(self):
+        out = StringIO()
+        call_command('resolve_stale_claims', stdout=out)
+
+        self.assertIn(f'Entry {self.entry.pk} of run {self.entry.run_id}', out.getvalue())
+        self.assertIn('1 stale claim(s) left to resolve.', out.getvalue())
+
+    def test_releases_stale_claims(self):
+        out = StringIO()
+        call_command('resolve_stale_claims', '--release', str(self.entry.pk), stdout=out)
+
+        self.assertIn('Released 1 stale claim(s).', out.getvalue())
+        self.assertIn('0 stale claim(s) left to resolve.', out.getvalue())
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, CollectionEntry.FAILED)
+
+    def test_releases_stale_payout_claims(self):
+        subscription = self.entry.subscription
+        entry = PayoutEntry.objects.create(
+            tenure_id=subscription.tenure_id, subscription=subscription,
+            pay_date=subscription.pay_date, claim=uuid.uuid4()
+        )
+        PayoutEntry.objects.filter(pk=entry.pk).update(
+            updated_at=timezone.now() - timezone.timedelta(hours=2)
+        )
+
+        out = StringIO()
+        call_command('resolve_stale_claims', stdout=out)
+        self.assertIn(f'Payout entry {entry.pk} claimed tenure', out.getvalue())
+        self.assertIn('1 stale payout claim(s) left to resolve.', out.getvalue())
+
+        out = StringIO()
+        call_command('resolve_stale_claims', '--release-payouts', str(entry.pk), stdout=out)
+        self.assertIn('Released 1 stale payout claim(s).', out.getvalue())
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, PayoutEntry.FAILED)
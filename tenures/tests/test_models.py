@@ -1,8 +1,11 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.core.cache import caches
 
+from tenures import checks, tasks
 from tenures.models import (
+    hasher, MEMBERSHIP_CACHE_KEY,
     EsusuGroup,
     FutureTenure, LiveTenure,
     Watch, LiveSubscription
@@ -26,12 +29,37 @@ class EsusuGroupTest(TestCase):
         self.assertIsNotNone(self.eg.hash_id)
         self.assertNotEqual(self.eg.hash_id, '')
 
+    def test_creation_takes_a_single_write(self):
+        with self.assertNumQueries(1):
+            eg = EsusuGroup.objects.create(name='Sad Pockets', admin=self.user)
+        self.assertEqual(eg.hash_id, EsusuGroup.get_hash_id(eg.pk))
+
+    def test_bulk_created_groups_have_hash_ids(self):
+        EsusuGroup.objects.bulk_create([
+            EsusuGroup(name='First Bulk', admin=self.user),
+            EsusuGroup(name='Second Bulk', admin=self.user),
+        ])
+
+        hash_ids = [eg.hash_id for eg in EsusuGroup.objects.filter(name__endswith='Bulk')]
+        self.assertEqual(len(set(hash_ids)), 2)
+        for hash_id in hash_ids:
+            self.assertGreaterEqual(len(hash_id), 11)
+
     def test_hash_id_is_at_least_11_chars(self):
         '''
         Assert that hash id is at least 11-character long.
         '''
         self.assertGreaterEqual(len(self.eg.hash_id), 11)
 
+    def test_hash_id_resolves_back_to_pk(self):
+        self.assertEqual(EsusuGroup.get_pk_from_hash_id(self.eg.hash_id), self.eg.pk)
+
+    def test_foreign_hash_id_resolves_to_none(self):
+        self.assertIsNone(EsusuGroup.get_pk_from_hash_id('not-a-hash'))
+        self.assertIsNone(EsusuGroup.get_pk_from_hash_id(''))
+        # hashes of several numbers are not group hash ids
+        self.assertIsNone(EsusuGroup.get_pk_from_hash_id(hasher.encode(1, 2)))
+
 
 class EsusuGroupMembershipTest(TestCase):
     '''
@@ -88,6 +116,77 @@ class EsusuGroupMembershipTest(TestCase):
         self.assertTrue(self.group.has_member(self.ambrose))
 
 
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'responses': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'memberships': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class EsusuGroupMembershipCacheTest(EsusuGroupMembershipTest):
+    '''
+    Group memberships are cached per user, and forgotten
+    whenever the user's watches or subscriptions change.
+    '''
+    def tearDown(self):
+        caches['memberships'].clear()
+
+    def test_membership_check_is_cached(self):
+        ft = FutureTenure.objects.create(esusu_group=self.group, amount=5000)
+        Watch.objects.create(user=self.ambrose, tenure=ft)
+        self.assertTrue(self.group.has_member(self.ambrose))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.group.has_member(self.ambrose))
+
+    def test_memberships_are_cached_under_their_alias(self):
+        ft = FutureTenure.objects.create(esusu_group=self.group, amount=5000)
+        Watch.objects.create(user=self.ambrose, tenure=ft)
+        self.group.has_member(self.ambrose)
+
+        self.assertEqual(
+            caches['memberships'].get(MEMBERSHIP_CACHE_KEY.format(self.ambrose.pk)),
+            {self.group.pk}
+        )
+
+    def test_local_memory_membership_cache_is_warned_of(self):
+        self.assertEqual(
+            [warning.id for warning in checks.check_membership_cache(None)],
+            ['tenures.W001']
+        )
+        with override_settings(CACHES={'memberships': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache'
+        }}):
+            self.assertEqual(checks.check_membership_cache(None), [])
+
+    def test_cached_membership_is_forgotten_on_watch_deletion(self):
+        ft = FutureTenure.objects.create(esusu_group=self.group, amount=5000)
+        watch = Watch.objects.create(user=self.ambrose, tenure=ft)
+        self.assertTrue(self.group.has_member(self.ambrose))
+
+        watch.delete(hard=True)
+
+        self.assertFalse(self.group.has_member(self.ambrose))
+
+    def test_cached_membership_is_forgotten_on_soft_watch_deletion(self):
+        ft = FutureTenure.objects.create(esusu_group=self.group, amount=5000)
+        watch = Watch.objects.create(user=self.ambrose, tenure=ft)
+        self.assertTrue(self.group.has_member(self.ambrose))
+
+        watch.delete()
+
+        self.assertFalse(self.group.has_member(self.ambrose))
+
+    def test_cached_membership_is_forgotten_on_promotion(self):
+        ft = FutureTenure.objects.create(esusu_group=self.group, amount=5000)
+        Watch.objects.create(user=self.ambrose, tenure=ft, status=Watch.OPTED_IN)
+        Watch.objects.create(user=self.bryan, tenure=ft)
+        self.assertTrue(self.group.has_member(self.bryan))
+
+        tasks.promote_future_tenure(ft.pk)
+
+        self.assertTrue(self.group.has_member(self.ambrose))
+        self.assertFalse(self.group.has_member(self.bryan))
+
+
 class FutureTenureTest(TestCase):
 
     def setUp(self):
@@ -106,6 +205,15 @@ class FutureTenureTest(TestCase):
         '''
         self.assertEqual(self.ft.hash_id, self.eg.hash_id)
 
+    def test_has_integer_pk(self):
+        self.assertIsInstance(self.ft.pk, int)
+
+    def test_creation_takes_a_single_write(self):
+        eg = EsusuGroup.objects.create(name='Sad Pockets', admin=self.user)
+        with self.assertNumQueries(1):
+            ft = FutureTenure.objects.create(amount=5000, esusu_group=eg)
+        self.assertEqual(ft.hash_id, eg.hash_id)
+
 
 class LiveSubscriptionTest(TestCase):
 
@@ -117,11 +225,12 @@ class LiveSubscriptionTest(TestCase):
         group = EsusuGroup.objects.create(name='Lifelong Savers', admin=mfon)
         lt = LiveTenure.objects.create(esusu_group=group, amount=5000)
         self.ls = LiveSubscription.objects.create(user=mfon, tenure=lt)
-        self.ls.next_charge_at = timezone.now() - timezone.timedelta(3)
+        self.ls.next_charge_date = (timezone.now() - timezone.timedelta(3)).date()
         self.ls.save()
 
     def test_reset_next_charge_date(self):
-        self.assertNotEqual(self.ls.next_charge_at, timezone.now() + timezone.timedelta(7))
+        next_week = (timezone.now() + timezone.timedelta(7)).date()
+        self.assertNotEqual(self.ls.next_charge_date, next_week)
         self.ls.reset_next_charge_date()
         self.ls.refresh_from_db()
-        self.assertEqual(self.ls.next_charge_at, timezone.now() + timezone.timedelta(7))
+        self.assertEqual(self.ls.next_charge_date, next_week)
@@ -0,0 +1,111 @@
+from datetime import date, datetime
+from io import StringIO
+from unittest import skipIf, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from .. import partitions
+from ..models import Contribution, EsusuGroup, LiveTenure
+
+
+class PartitionMonthsTest(TestCase):
+
+    def test_get_month(self):
+        self.assertEqual(partitions.get_month(date(2019, 12, 25)), date(2019, 12, 1))
+        self.assertEqual(
+            partitions.get_month(datetime(2019, 12, 31, 23, tzinfo=timezone.utc)),
+            date(2019, 12, 1)
+        )
+
+    def test_add_months_wraps_around_years(self):
+        self.assertEqual(partitions.add_months(date(2019, 11, 1), 2), date(2020, 1, 1))
+        self.assertEqual(partitions.add_months(date(2020, 1, 1), -1), date(2019, 12, 1))
+
+    def test_partition_name_and_bounds(self):
+        month = date(2019, 12, 1)
+
+        self.assertEqual(
+            partitions.get_partition_name('tenures_contribution', month),
+            'tenures_contribution_p201912'
+        )
+        self.assertEqual(partitions.get_partition_bounds(month), (
+            datetime(2019, 12, 1, tzinfo=timezone.utc),
+            datetime(2020, 1, 1, tzinfo=timezone.utc)
+        ))
+
+
+class ContributionPartitionsTest(TestCase):
+
+    def setUp(self):
+        self.mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        group = EsusuGroup.objects.create(name='Lifelong Savers', admin=self.mfon)
+        self.lt = LiveTenure.objects.create(esusu_group=group, amount=5000)
+
+    def get_partition_of(self, contribution):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT tableoid::regclass::text FROM tenures_contribution WHERE id = %s',
+                [contribution.pk]
+            )
+            return cursor.fetchone()[0]
+
+    @skipIf(partitions.supports_partitioning(connection), 'ledger is partitioned')
+    def test_partitions_are_not_managed_without_partitioning(self):
+        out = StringIO()
+        call_command('contribution_partitions', stdout=out)
+
+        self.assertEqual(partitions.create_contribution_partitions(), [])
+        self.assertEqual(partitions.detach_contribution_partitions(date.today()), [])
+        self.assertIn('not partitioned', out.getvalue())
+
+    @skipUnless(partitions.supports_partitioning(connection), 'ledger is not partitioned')
+    def test_contributions_are_stored_in_the_partition_of_their_month(self):
+        contribution = Contribution.objects.create(amount=5000, tenure=self.lt, user=self.mfon)
+
+        self.assertEqual(
+            self.get_partition_of(contribution),
+            partitions.get_partition_name(
+                'tenures_contribution', partitions.get_month(contribution.created_at)
+            )
+        )
+
+    @skipUnless(partitions.supports_partitioning(connection), 'ledger is not partitioned')
+    def test_created_partition_takes_rows_of_its_month_from_default(self):
+        month = partitions.add_months(
+            partitions.get_month(timezone.now()), partitions.PARTITIONS_AHEAD + 1
+        )
+        contribution = Contribution.objects.create(amount=5000, tenure=self.lt, user=self.mfon)
+        Contribution.objects.filter(pk=contribution.pk).update(
+            created_at=partitions.get_partition_bounds(month)[0]
+        )
+        self.assertEqual(self.get_partition_of(contribution), 'tenures_contribution_default')
+
+        created = partitions.create_contribution_partitions(
+            months_ahead=partitions.PARTITIONS_AHEAD + 1
+        )
+
+        self.assertEqual(created, [partitions.get_partition_name('tenures_contribution', month)])
+        self.assertEqual(self.get_partition_of(contribution), created[0])
+
+    @skipUnless(partitions.supports_partitioning(connection), 'ledger is not partitioned')
+    def test_old_partitions_are_detached(self):
+        this_month = partitions.get_month(timezone.now())
+        partitions.create_partition(
+            connection, 'tenures_contribution', partitions.add_months(this_month, -24)
+        )
+
+        detached = partitions.detach_contribution_partitions(
+            partitions.add_months(this_month, -12)
+        )
+
+        self.assertEqual(detached, [partitions.get_partition_name(
+            'tenures_contribution', partitions.add_months(this_month, -24)
+        )])
+        self.assertNotIn(detached[0], partitions.get_partitions(connection))
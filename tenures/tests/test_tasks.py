@@ -1,14 +1,24 @@
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+
+import requests
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from django_dramatiq.test import DramatiqTestCase
+from dramatiq import Worker
 from hashids import Hashids
 
-from .. import tasks
+from .. import archive, tasks
 from ..models import (
     EsusuGroup,
-    FutureTenure, LiveTenure,
-    Watch, LiveSubscription,
-    Contribution
+    FutureTenure, LiveTenure, HistoricalTenure,
+    Watch, LiveSubscription, HistoricalSubscription,
+    Contribution, ArchivedContributor, CollectionRun, CollectionEntry, PayoutEntry
 )
 from payments.models import Processor
 
@@ -151,11 +161,58 @@ class FutureTenureAndWatchRelatedTasksTest(TestCase):
         tasks.promote_future_tenure(ft_pk=self.ft.pk)
 
         pay_datetime = timezone.now()
-        for lsub in LiveSubscription.objects.filter(tenure__esusu_group=self.group):
+        for lsub in LiveSubscription.objects.filter(
+                tenure__esusu_group=self.group
+                ).order_by('created_at', 'pk'):
             pay_datetime = pay_datetime + timezone.timedelta(30)
             self.assertEqual(lsub.pay_date, pay_datetime.date())
 
 
+    def test_promotion_queries_do_not_grow_with_opted_in_watches(self):
+        Watch.objects.update(status=Watch.OPTED_IN)
+
+        # savepoint, select (and lock) ft, select opted in watches, insert lt,
+        # insert subscriptions, select and delete watches, select ft,
+        # select its (cascaded) watches, delete ft, release savepoint
+        with self.assertNumQueries(11):
+            tasks.promote_future_tenure(ft_pk=self.ft.pk)
+
+        self.assertEqual(LiveSubscription.objects.filter(tenure__esusu_group=self.group).count(), 4)
+
+    def test_promote_due_future_tenures(self):
+        ambrose = get_user_model().objects.create_user(
+            email='ambrose@igibo.com', password='nopassword',
+            first_name='Ambrose', last_name='Igibo'
+        )
+        group = EsusuGroup.objects.create(name='Save for School', admin=ambrose)
+        not_due_ft = FutureTenure.objects.create(esusu_group=group, amount=5000)
+        Watch.objects.create(user=ambrose, tenure=not_due_ft, status=Watch.OPTED_IN)
+        Watch.objects.filter(tenure=self.ft).update(status=Watch.OPTED_IN)
+        FutureTenure.objects.filter(pk=self.ft.pk).update(
+            will_go_live_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+
+        promoted = tasks.promote_due_future_tenures()
+
+        self.assertEqual(promoted, 1)
+        self.assertFalse(FutureTenure.objects.filter(pk=self.ft.pk).exists())
+        self.assertTrue(FutureTenure.objects.filter(pk=not_due_ft.pk).exists())
+        self.assertEqual(LiveSubscription.objects.filter(tenure__esusu_group=self.group).count(), 4)
+        self.assertFalse(LiveTenure.objects.filter(esusu_group=group).exists())
+        self.assertEqual(Watch.objects.filter(tenure=not_due_ft).count(), 1)
+
+    @skipUnless(connection.features.has_select_for_update_skip_locked, 'no row locks to skip')
+    def test_due_future_tenures_locked_by_another_sweep_are_skipped(self):
+        FutureTenure.objects.filter(pk=self.ft.pk).update(
+            will_go_live_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            tasks.promote_due_future_tenures()
+
+        self.assertTrue(any('SKIP LOCKED' in query['sql'] for query in queries))
+
+
 class ContributionsCollectionTasksTest(TestCase):
     '''
     Test the collection of weekly due contributions.
@@ -246,3 +303,659 @@ class ContributionsCollectionTasksTest(TestCase):
 
         for contribution in Contribution.objects.all():
             self.assertEqual(contribution.tenure, mfons_lt)
+
+    def test_next_charge_date_is_moved_forward_on_collection(self):
+        tasks.collect_due_contributions()
+
+        self.assertFalse(
+            LiveSubscription.objects.filter(next_charge_date=timezone.now().date()).exists()
+        )
+        self.assertEqual(
+            LiveSubscription.objects.filter(
+                next_charge_date=(timezone.now() + timezone.timedelta(7)).date()
+            ).count(),
+            5
+        )
+
+    def test_subscriptions_without_processor_are_not_collected(self):
+        Processor.objects.filter(user=self.mfon).delete(hard=True)
+
+        collected = tasks.collect_due_contributions()
+
+        self.assertEqual(collected, 2)
+        self.assertFalse(Contribution.objects.filter(user=self.mfon).exists())
+        self.assertTrue(
+            LiveSubscription.objects.filter(
+                user=self.mfon, next_charge_date=timezone.now().date()
+            ).exists()
+        )
+
+    def test_collection_queries_do_not_grow_with_due_subscriptions(self):
+        '''
+        Collection costs a constant number of queries per chunk,
+        regardless of how many subscriptions are due in the chunk.
+        '''
+        # create run, select chunk, insert ledger entries, reclaim failed
+        # entries, select claimed entries, select processors, savepoint,
+        # insert contributions, update (the one) tenure balance, update
+        # subscriptions, update (charged) ledger entries, release savepoint,
+        # update run, finish run (the chunk was short, so it was the last)
+        with self.assertNumQueries(14):
+            tasks.collect_due_contributions()
+
+    def test_collection_is_recorded_in_ledger(self):
+        tasks.collect_due_contributions()
+
+        run = CollectionRun.objects.get()
+        self.assertTrue(run.is_finished())
+        self.assertEqual(run.collected, 3)
+        self.assertEqual(run.get_progress(), {
+            CollectionEntry.CLAIMED: 0,
+            CollectionEntry.CHARGED: 3,
+            CollectionEntry.FAILED: 0,
+        })
+
+    def test_rerun_does_not_charge_twice(self):
+        '''
+        A run that died after charging, but before moving the next charge
+        dates forward, leaves its claims in the ledger for a rerun to skip.
+        '''
+        dead_run = CollectionRun.objects.create(charge_date=timezone.now().date())
+        subscription = LiveSubscription.objects.filter(
+            next_charge_date=timezone.now().date()
+        ).first()
+        CollectionEntry.objects.create(
+            run=dead_run, subscription=subscription, charge_date=dead_run.charge_date
+        )
+
+        collected = tasks.collect_due_contributions()
+
+        self.assertEqual(collected, 2)
+        self.assertFalse(Contribution.objects.filter(user=subscription.user).exists())
+        self.assertEqual(dead_run.get_progress()[CollectionEntry.CLAIMED], 1)
+
+    def test_failed_charges_are_retried_on_rerun(self):
+        Processor.objects.filter(user=self.mfon).delete(hard=True)
+        tasks.collect_due_contributions()
+
+        Processor.objects.create(
+            user=self.mfon, card_type=Processor.VISA,
+            card_id=Hashids(min_length=32).encode(self.mfon.pk),
+        )
+        collected = tasks.collect_due_contributions()
+
+        rerun = CollectionRun.objects.latest('created_at')
+        self.assertEqual(collected, 1)
+        self.assertEqual(Contribution.objects.filter(user=self.mfon).count(), 1)
+        self.assertEqual(rerun.get_progress()[CollectionEntry.CHARGED], 1)
+        self.assertFalse(CollectionEntry.objects.filter(status=CollectionEntry.FAILED).exists())
+
+    def test_failed_charges_are_retried_by_one_run_only(self):
+        Processor.objects.filter(user=self.mfon).delete(hard=True)
+        tasks.collect_due_contributions()
+        subscriptions = list(LiveSubscription.objects.filter(
+            user=self.mfon, next_charge_date=timezone.now().date()
+        ))
+
+        runs = [
+            CollectionRun.objects.create(charge_date=timezone.now().date())
+            for _ in range(2)
+        ]
+        claims = [tasks._claim_subscriptions(subscriptions, run) for run in runs]
+
+        self.assertEqual(claims, [subscriptions, []])
+
+    def test_stale_claims_are_exposed_and_released(self):
+        dead_run = CollectionRun.objects.create(charge_date=timezone.now().date())
+        subscription = LiveSubscription.objects.filter(
+            next_charge_date=timezone.now().date()
+        ).first()
+        entry = CollectionEntry.objects.create(
+            run=dead_run, subscription=subscription, charge_date=dead_run.charge_date
+        )
+        self.assertFalse(tasks.get_stale_claims().exists())
+
+        CollectionEntry.objects.filter(pk=entry.pk).update(
+            updated_at=timezone.now() - tasks.STALE_CLAIM_AFTER
+        )
+        self.assertEqual(list(tasks.get_stale_claims()), [entry])
+
+        # the provider was checked, and had no charge for it
+        self.assertEqual(tasks.release_stale_claims([entry.pk]), 1)
+        collected = tasks.collect_due_contributions()
+
+        self.assertEqual(collected, 3)
+        self.assertTrue(Contribution.objects.filter(user=subscription.user).exists())
+
+    def test_charges_of_unknown_outcome_are_left_claimed(self):
+        with mock.patch(
+            'payments.clients.DummyProcessorClient.send',
+            side_effect=requests.ConnectionError
+        ), self.assertLogs('payments.clients', 'WARNING'):
+            collected = tasks.collect_due_contributions()
+
+        run = CollectionRun.objects.get()
+        self.assertEqual(collected, 0)
+        self.assertEqual(run.failed, 0)
+        self.assertEqual(run.get_progress()[CollectionEntry.CLAIMED], 3)
+        self.assertFalse(Contribution.objects.exists())
+
+    def test_collection_tops_up_tenure_balances(self):
+        tasks.collect_due_contributions(chunk_size=2)
+
+        lt1 = LiveTenure.objects.get(esusu_group__name='Lifelong Savers')
+        self.assertEqual(lt1.balance, 15000)
+        self.assertEqual(lt1.total_collected, 15000)
+        lt2 = LiveTenure.objects.get(esusu_group__name='Save for School')
+        self.assertEqual(lt2.balance, 0)
+
+    def test_collection_is_chunked(self):
+        collected = tasks.collect_due_contributions(chunk_size=2)
+
+        self.assertEqual(collected, 3)
+        self.assertEqual(Contribution.objects.count(), 3)
+
+    @skipUnless(connection.vendor == 'sqlite', 'query plan format is backend specific')
+    def test_due_subscriptions_are_looked_up_by_index(self):
+        plan = tasks.get_due_subscriptions().select_related('tenure').order_by('pk').explain()
+
+        self.assertRegex(plan, r'SEARCH tenures_livesubscription USING INDEX \w+ \(next_charge_date=\?\)')
+        self.assertNotIn('SCAN tenures_livesubscription', plan)
+
+
+class PayoutTasksTest(TestCase):
+    '''
+    Test the pay out of the pots of live tenures
+    to the subscribers whose pay date has come.
+    '''
+    def setUp(self):
+        today = timezone.now().date()
+        self.mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        group = EsusuGroup.objects.create(
+            name='Lifelong Savers', admin=self.mfon
+        )
+        self.lt = LiveTenure.objects.create(
+            amount=5000, esusu_group=group,
+            previous_pay_date=today - timezone.timedelta(30),
+            next_pay_date=today
+        )
+        self.subscribers = []
+        for i in range(3):
+            subscriber = get_user_model().objects.create_user(
+                email=f'subscriber{i}@aol.com', password='iSubscribe',
+                first_name='Subscriber', last_name=str(i)
+            )
+            Processor.objects.create(
+                user=subscriber, card_type=Processor.VISA,
+                card_id=Hashids(min_length=32).encode(subscriber.pk),
+            )
+            LiveSubscription.objects.create(
+                tenure=self.lt, user=subscriber,
+                pay_date=today + timezone.timedelta(30 * i)
+            )
+            self.subscribers.append(subscriber)
+
+        for subscriber in self.subscribers:
+            Contribution.objects.create(amount=5000, tenure=self.lt, user=subscriber)
+        # contribution from before the previous pay date, paid out on it
+        old = Contribution.objects.create(amount=5000, tenure=self.lt, user=self.mfon)
+        Contribution.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timezone.timedelta(40)
+        )
+        LiveTenure.objects.filter(pk=self.lt.pk).update(
+            balance=F('balance') - 5000, total_paid_out=F('total_paid_out') + 5000
+        )
+
+    def test_pay_out_due_subscriptions(self):
+        credited = tasks.pay_out_due_subscriptions()
+
+        self.assertEqual(credited, 1)
+
+    def test_pot_is_balance_of_live_tenure(self):
+        alerts = tasks._pay_out_to_subscriptions(list(
+            LiveSubscription.objects.filter(user=self.subscribers[0])
+            .select_related('tenure')
+        ))
+
+        self.assertEqual(alerts[0].user_pk, self.subscribers[0].pk)
+        self.assertEqual(alerts[0].amount, 15000)
+
+    def test_balance_is_debited_on_pay_out(self):
+        tasks.pay_out_due_subscriptions()
+
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.balance, 0)
+        self.assertEqual(self.lt.total_collected, 20000)
+        self.assertEqual(self.lt.total_paid_out, 20000)
+
+    def test_balance_is_not_debited_on_failed_pay_out(self):
+        Processor.objects.filter(user=self.subscribers[0]).delete(hard=True)
+
+        tasks.pay_out_due_subscriptions()
+
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.balance, 15000)
+
+    def test_reconcile_tenure_balances(self):
+        self.assertEqual(tasks.reconcile_tenure_balances(), [])
+
+        # a contribution slipped in without its tenure being told
+        Contribution.objects.bulk_create([
+            Contribution(amount=5000, tenure=self.lt, user=self.mfon)
+        ])
+        drifts = tasks.reconcile_tenure_balances(fix=True)
+
+        self.assertEqual(drifts, [(self.lt.pk, 20000, 25000)])
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.total_collected, 25000)
+        self.assertEqual(self.lt.balance, 20000)
+        self.assertEqual(tasks.reconcile_tenure_balances(), [])
+
+    def test_pay_dates_are_moved_forward_on_pay_out(self):
+        today = timezone.now().date()
+
+        tasks.pay_out_due_subscriptions()
+
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.previous_pay_date, today)
+        self.assertEqual(self.lt.next_pay_date, today + timezone.timedelta(30))
+
+    def test_live_tenure_is_paid_out_once_per_pay_date(self):
+        tasks.pay_out_due_subscriptions()
+        credited = tasks.pay_out_due_subscriptions()
+
+        self.assertEqual(credited, 0)
+
+    def test_pay_dates_are_not_moved_forward_on_failed_pay_out(self):
+        Processor.objects.filter(user=self.subscribers[0]).delete(hard=True)
+
+        credited = tasks.pay_out_due_subscriptions()
+
+        self.assertEqual(credited, 0)
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.next_pay_date, timezone.now().date())
+
+    def test_failed_pay_out_is_retried_on_rerun(self):
+        processor = Processor.objects.get(user=self.subscribers[0])
+        processor.delete()
+
+        tasks.pay_out_due_subscriptions()
+        processor.undelete()
+        credited = tasks.pay_out_due_subscriptions()
+
+        self.assertEqual(credited, 1)
+        self.assertEqual(PayoutEntry.objects.get().status, PayoutEntry.PAID)
+
+    def test_pay_out_of_unknown_outcome_is_not_credited_again_on_rerun(self):
+        with mock.patch(
+            'payments.clients.DummyProcessorClient.send',
+            side_effect=requests.ConnectionError
+        ), self.assertLogs('payments.clients', 'WARNING'):
+            credited = tasks.pay_out_due_subscriptions()
+
+        self.assertEqual(credited, 0)
+        self.assertEqual(PayoutEntry.objects.get().status, PayoutEntry.CLAIMED)
+
+        with mock.patch.object(tasks, 'credit_users', wraps=tasks.credit_users) as credit:
+            credited = tasks.pay_out_due_subscriptions()
+
+        self.assertEqual(credited, 0)
+        credit.assert_not_called()
+        self.lt.refresh_from_db()
+        self.assertEqual(self.lt.balance, 15000)
+
+    def test_stale_payout_claims_are_exposed_and_released(self):
+        with mock.patch(
+            'payments.clients.DummyProcessorClient.send',
+            side_effect=requests.ConnectionError
+        ), self.assertLogs('payments.clients', 'WARNING'):
+            tasks.pay_out_due_subscriptions()
+        entry = PayoutEntry.objects.get()
+
+        self.assertFalse(tasks.get_stale_payout_claims().exists())
+
+        PayoutEntry.objects.filter(pk=entry.pk).update(
+            updated_at=timezone.now() - timezone.timedelta(hours=2)
+        )
+        self.assertEqual(list(tasks.get_stale_payout_claims()), [entry])
+
+        # known not to have been credited, so it is credited on the rerun
+        self.assertEqual(tasks.release_stale_payout_claims([entry.pk]), 1)
+        self.assertEqual(tasks.pay_out_due_subscriptions(), 1)
+
+
+class DissolutionTasksTest(TestCase):
+    '''
+    Test the dissolution of live tenures that have paid out
+    to all their subscribers into historical tenures.
+    '''
+    def setUp(self):
+        self.today = timezone.now().date()
+        self.mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        self.subscribers = [
+            get_user_model().objects.create_user(
+                email=f'subscriber{i}@aol.com', password='iSubscribe',
+                first_name='Subscriber', last_name=str(i)
+            ) for i in range(3)
+        ]
+        # paid out to its last subscriber ten days ago
+        self.finished = self.make_live_tenure('Finished Savers', -10, [-70, -40, -10])
+        # yet to pay out to its last subscriber
+        self.unfinished = self.make_live_tenure('Unfinished Savers', -30, [-30, 0, 30])
+
+    def make_live_tenure(self, name, previous_pay_day, pay_days):
+        group = EsusuGroup.objects.create(name=name, admin=self.mfon)
+        lt = LiveTenure.objects.create(
+            amount=5000, esusu_group=group,
+            previous_pay_date=self.today + timezone.timedelta(previous_pay_day),
+            next_pay_date=self.today + timezone.timedelta(previous_pay_day + 30)
+        )
+        for subscriber, pay_day in zip(self.subscribers, pay_days):
+            LiveSubscription.objects.create(
+                tenure=lt, user=subscriber,
+                pay_date=self.today + timezone.timedelta(pay_day)
+            )
+            Contribution.objects.create(amount=5000, tenure=lt, user=subscriber)
+        return lt
+
+    def test_only_finished_live_tenures_are_dissolved(self):
+        self.assertEqual(list(tasks.get_finished_live_tenures()), [self.finished])
+
+        dissolved = tasks.dissolve_finished_live_tenures()
+
+        self.assertEqual(dissolved, 1)
+        self.assertEqual(list(LiveTenure.all_objects.all()), [self.unfinished])
+        self.assertFalse(
+            LiveSubscription.all_objects.filter(tenure=self.finished.pk).exists()
+        )
+
+    def test_historical_tenure_is_left_behind(self):
+        LiveTenure.objects.filter(pk=self.finished.pk).update(total_paid_out=15000)
+
+        tasks.dissolve_finished_live_tenures()
+
+        ht = HistoricalTenure.objects.get()
+        self.assertEqual(ht.esusu_group_id, self.finished.esusu_group_id)
+        self.assertEqual(ht.live_tenure_id, self.finished.pk)
+        self.assertEqual(ht.live_at, self.finished.live_at)
+        self.assertEqual(ht.amount, 5000)
+        self.assertEqual(ht.total_collected, 15000)
+        self.assertEqual(ht.total_paid_out, 15000)
+        self.assertCountEqual(
+            HistoricalSubscription.objects.filter(tenure=ht).values_list('user', flat=True),
+            [subscriber.pk for subscriber in self.subscribers]
+        )
+
+    def test_contributions_are_moved_to_historical_tenure(self):
+        tasks.dissolve_finished_live_tenures()
+
+        ht = HistoricalTenure.objects.get()
+        self.assertEqual(ht.contributions.count(), 3)
+        self.assertFalse(Contribution.objects.filter(tenure__isnull=False, historical_tenure=ht).exists())
+        self.assertEqual(self.unfinished.contributions.count(), 3)
+
+    def test_group_of_dissolved_tenure_can_go_live_again(self):
+        ft = FutureTenure.objects.create(
+            esusu_group_id=self.finished.esusu_group_id, amount=2000,
+            will_go_live_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+
+        tasks.dissolve_finished_live_tenures()
+        tasks.promote_due_future_tenures()
+
+        self.assertEqual(LiveTenure.objects.get(esusu_group=ft.esusu_group_id).amount, 2000)
+
+    def test_dissolution_queries_do_not_grow_with_finished_tenures(self):
+        for i in range(5):
+            self.make_live_tenure(f'Finished Savers {i}', -10, [-70, -40, -10])
+
+        # savepoint, lock, 3 writes (and 2 reads) to history,
+        # 2 deletes (and 4 reads) of live rows, 3 of their ledger entries, release
+        with self.assertNumQueries(17):
+            dissolved = tasks.dissolve_finished_live_tenures()
+
+        self.assertEqual(dissolved, 6)
+        self.assertEqual(HistoricalSubscription.objects.count(), 18)
+
+    def test_sweep_dissolves_in_batches(self):
+        for i in range(4):
+            self.make_live_tenure(f'Finished Savers {i}', -10, [-70, -40, -10])
+
+        dissolved = tasks.sweep_finished_live_tenures(batch_size=2)
+
+        self.assertEqual(dissolved, 5)
+        self.assertEqual(HistoricalTenure.objects.count(), 5)
+        self.assertEqual(list(LiveTenure.objects.all()), [self.unfinished])
+
+
+class ContributionArchiveTasksTest(TestCase):
+    '''
+    Test the archival of the contributions of historical tenures.
+    '''
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        settings_override = override_settings(CONTRIBUTION_ARCHIVE_DIR=self.archive_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        group = EsusuGroup.objects.create(name='Lifelong Savers', admin=self.mfon)
+        self.ht = HistoricalTenure.objects.create(
+            amount=5000, esusu_group=group, live_at=timezone.now()
+        )
+        self.contribute(3)
+
+    def contribute(self, times):
+        Contribution.objects.bulk_create(
+            Contribution(amount=5000, historical_tenure=self.ht, user=self.mfon)
+            for _ in range(times)
+        )
+
+    def get_ledger_pks(self):
+        return [row['id'] for row in archive.iter_historical_ledger(self.ht.pk)]
+
+    def test_contributions_are_moved_into_archive(self):
+        pks = list(Contribution.objects.order_by('pk').values_list('pk', flat=True))
+
+        archived = archive.archive_tenure_contributions(self.ht.pk, batch_size=2)
+
+        self.assertEqual(archived, 3)
+        self.assertFalse(Contribution.all_objects.exists())
+        index = archive.read_index(self.ht.pk)
+        self.assertEqual(index['count'], 3)
+        self.assertEqual(index['total'], '15000.00')
+        self.assertEqual(index['last_pk'], pks[-1])
+        self.assertEqual(index['users'], [self.mfon.pk])
+        rows = list(archive.iter_archived_contributions(self.ht.pk))
+        self.assertEqual([row['id'] for row in rows], pks)
+        self.assertEqual(rows[0]['amount'], 5000)
+        self.assertEqual(rows[0]['user'], self.mfon.pk)
+
+    def test_archive_is_appended_to(self):
+        archive.archive_tenure_contributions(self.ht.pk)
+        self.contribute(2)
+
+        self.assertEqual(len(self.get_ledger_pks()), 5)
+        archive.archive_tenure_contributions(self.ht.pk)
+
+        self.assertEqual(archive.read_index(self.ht.pk)['count'], 5)
+        self.assertEqual(len(self.get_ledger_pks()), 5)
+        self.assertFalse(Contribution.all_objects.exists())
+
+    def test_archival_that_died_can_be_run_again(self):
+        pks = list(Contribution.objects.order_by('pk').values_list('pk', flat=True))
+        with mock.patch.object(archive, '_write_index', side_effect=OSError):
+            with self.assertRaises(OSError):
+                archive.archive_tenure_contributions(self.ht.pk)
+
+        # nothing was deleted, and nothing is read twice
+        self.assertEqual(Contribution.objects.count(), 3)
+        self.assertEqual(self.get_ledger_pks(), pks)
+
+        archive.archive_tenure_contributions(self.ht.pk)
+
+        self.assertEqual(archive.read_index(self.ht.pk)['count'], 3)
+        self.assertEqual(self.get_ledger_pks(), pks)
+        self.assertFalse(Contribution.all_objects.exists())
+
+    def test_user_ledger_takes_in_archived_contributions(self):
+        archive.archive_tenure_contributions(self.ht.pk)
+        self.contribute(1)
+        group = EsusuGroup.objects.create(name='Sad Pockets', admin=self.mfon)
+        lt = LiveTenure.objects.create(esusu_group=group, amount=2000)
+        Contribution.objects.create(amount=2000, tenure=lt, user=self.mfon)
+
+        rows = list(tasks.iter_contribution_ledger(user_pk=self.mfon.pk))
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual([row['historical_tenure'] for row in rows], [self.ht.pk] * 4 + [None])
+        self.assertEqual(rows[-1]['tenure'], lt.pk)
+        self.assertEqual(rows, sorted(rows, key=lambda row: row['created_at']))
+        self.assertEqual(archive.get_archived_tenure_pks(self.mfon.pk + 1), [])
+
+    def test_archived_tenures_are_looked_up_without_reading_indexes(self):
+        archive.archive_tenure_contributions(self.ht.pk)
+
+        with mock.patch.object(archive, 'read_index') as read_index, \
+                self.assertNumQueries(1):
+            ht_pks = archive.get_archived_tenure_pks(self.mfon.pk)
+
+        self.assertEqual(ht_pks, [self.ht.pk])
+        self.assertFalse(read_index.called)
+        self.assertEqual(
+            list(ArchivedContributor.objects.values_list('historical_tenure', 'user')),
+            [(self.ht.pk, self.mfon.pk)]
+        )
+
+    def test_ledger_does_not_read_archived_contributions_twice(self):
+        # an archival that died before deleting what it archived
+        with mock.patch.object(archive, '_delete_archived'):
+            archive.archive_tenure_contributions(self.ht.pk)
+
+        rows = list(tasks.iter_contribution_ledger(historical_tenure_pk=self.ht.pk))
+
+        self.assertEqual(Contribution.objects.count(), 3)
+        self.assertEqual(len(rows), 3)
+
+    def test_only_tenures_dissolved_long_enough_ago_are_archived(self):
+        self.assertEqual(tasks.archive_historical_contributions(after_days=30), 0)
+
+        HistoricalTenure.objects.filter(pk=self.ht.pk).update(
+            created_at=timezone.now() - timezone.timedelta(31)
+        )
+
+        self.assertEqual(tasks.archive_historical_contributions(after_days=30), 3)
+
+
+class ParallelContributionsCollectionTasksTest(DramatiqTestCase):
+    '''
+    Test the collection of weekly due contributions
+    fanned out in shards to (stub broker) workers.
+    '''
+    def _pre_setup(self):
+        super()._pre_setup()
+        # sqlite's shared in-memory test database locks whole tables,
+        # so messages are only processed once they've all been sent,
+        # and by a single worker thread (see `drain`)
+        self.worker.stop()
+
+    def setUp(self):
+        mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        group = EsusuGroup.objects.create(
+            name='Lifelong Savers', admin=mfon
+        )
+        lt = LiveTenure.objects.create(
+            amount=5000, esusu_group=group
+        )
+
+        for i in range(5):
+            subscriber = get_user_model().objects.create_user(
+                email=f'subscriber{i}@aol.com', password='iSubscribe',
+                first_name='Subscriber', last_name=str(i)
+            )
+            Processor.objects.create(
+                user=subscriber, card_type=Processor.VISA,
+                card_id=Hashids(min_length=32).encode(subscriber.pk),
+            )
+            LiveSubscription.objects.create(
+                tenure=lt, user=subscriber, next_charge_date=timezone.now().date()
+            )
+
+        # not due today
+        LiveSubscription.objects.create(tenure=lt, user=mfon)
+
+    def drain(self):
+        self.worker = Worker(self.broker, worker_timeout=100, worker_threads=1)
+        self.worker.start()
+        self.broker.join(tasks.collect_contributions_shard.queue_name)
+        self.worker.join()
+
+    def test_dispatch_collects_due_contributions_in_shards(self):
+        run = tasks.dispatch_due_weekly_contributions(shard_size=2)
+        self.drain()
+        run.refresh_from_db()
+
+        self.assertEqual(Contribution.objects.count(), 5)
+        self.assertEqual(run.shards, 3)
+        self.assertEqual(run.pending_shards, 0)
+        self.assertEqual(run.collected, 5)
+        self.assertEqual(run.failed, 0)
+        self.assertTrue(run.is_finished())
+
+    def test_dispatch_records_failed_charges(self):
+        Processor.objects.filter(user__email='subscriber0@aol.com').delete(hard=True)
+
+        run = tasks.dispatch_due_weekly_contributions(shard_size=2)
+        self.drain()
+        run.refresh_from_db()
+
+        self.assertEqual(run.collected, 4)
+        self.assertEqual(run.failed, 1)
+        self.assertTrue(run.is_finished())
+
+    def test_run_is_finished_when_a_shard_dies(self):
+        collect = tasks._collect_contributions_from_subscriptions
+        calls = []
+
+        def die_once(*args):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError('worker died')
+            return collect(*args)
+
+        with mock.patch.object(tasks, '_collect_contributions_from_subscriptions', die_once), \
+                self.assertLogs('dramatiq.worker', 'ERROR') as worker_logs, \
+                self.assertLogs('dramatiq.middleware.retries', 'WARNING'):
+            run = tasks.dispatch_due_weekly_contributions(shard_size=2)
+            self.drain()
+        run.refresh_from_db()
+
+        self.assertIn('worker died', '\n'.join(worker_logs.output))
+
+        self.assertEqual(run.pending_shards, 0)
+        self.assertEqual(run.failed_shards, 1)
+        self.assertTrue(run.is_finished())
+
+    def test_dispatch_without_due_subscriptions_finishes_run(self):
+        LiveSubscription.objects.update(
+            next_charge_date=(timezone.now() + timezone.timedelta(7)).date()
+        )
+
+        run = tasks.dispatch_due_weekly_contributions()
+        run.refresh_from_db()
+
+        self.assertEqual(run.shards, 0)
+        self.assertTrue(run.is_finished())
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+
+from django.contrib.auth import get_user_model
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from ... import tasks
+from ...models import Contribution, EsusuGroup, HistoricalTenure, LiveTenure
+
+
+class ContributionExportAPITest(APITestCase):
+    '''
+    * Weekly contributions are collected from the subscribers of live tenures
+    * Finance staff export the ledger of contributions, per tenure or per user
+
+    GET  /api/contributions/export/
+    '''
+    def setUp(self):
+        self.mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        self.ambrose = get_user_model().objects.create_user(
+            email='ambrose@igibo.com', password='nopassword',
+            first_name='Ambrose', last_name='Igibo'
+        )
+        self.staff = get_user_model().objects.create_user(
+            email='finance@susu.com', password='ledgerbound',
+            first_name='Fin', last_name='Ance', is_staff=True
+        )
+        group = EsusuGroup.objects.create(name='Lifelong Savers', admin=self.mfon)
+        self.lt = LiveTenure.objects.create(esusu_group=group, amount=5000)
+        other_group = EsusuGroup.objects.create(name='Sad Pockets', admin=self.mfon)
+        other_lt = LiveTenure.objects.create(esusu_group=other_group, amount=2000)
+
+        for user in [self.mfon, self.ambrose]:
+            Contribution.objects.create(amount=5000, tenure=self.lt, user=user)
+        Contribution.objects.create(amount=2000, tenure=other_lt, user=self.mfon)
+
+        self.url = reverse('contribution-export')
+
+    def test_export_tenure_ledger_as_csv(self):
+        self.client.force_authenticate(self.staff)
+
+        # one query, however many contributions there are
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'tenure': self.lt.pk})
+            content = b''.join(response.streaming_content).decode()
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('contributions.csv', response['Content-Disposition'])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({int(row['tenure']) for row in rows}, {self.lt.pk})
+
+    def test_export_user_ledger_as_ndjson(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get(self.url, {'user': self.mfon.pk, 'stream': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['user'] for row in rows}, {self.mfon.pk})
+
+    def test_export_historical_tenure_ledger_after_dissolution(self):
+        self.client.force_authenticate(self.staff)
+        tasks._dissolve_live_tenures([self.lt])
+        ht = HistoricalTenure.objects.get(live_tenure_id=self.lt.pk)
+
+        response = self.client.get(self.url, {'historical_tenure': ht.pk, 'stream': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row['historical_tenure'] for row in rows}, {ht.pk})
+        self.assertEqual({row['tenure'] for row in rows}, {None})
+
+    def test_cannot_export_with_invalid_filters(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get(self.url, {'tenure': 'all'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_non_staff_cannot_export(self):
+        self.client.force_authenticate(self.mfon)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
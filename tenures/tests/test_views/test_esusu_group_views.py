@@ -1,4 +1,5 @@
 import json
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from rest_framework import status
@@ -39,7 +40,66 @@ class EsusuGroupListApiTest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+
+    def test_list_group_queries_do_not_grow_with_groups(self):
+        ambrose = get_user_model().objects.create_user(
+            email='ambrose@igibo.com', password='nopassword',
+            first_name='Ambrose', last_name='Igibo'
+        )
+        EsusuGroup.objects.create(name='Fifth Group', admin=ambrose)
+        self.client.force_authenticate(user=self.user)
+        url = reverse('esusugroup-list')
+
+        # the validators are read off the page:
+        # list groups along with their admins
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+    def test_list_group_is_cursor_paginated(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('esusugroup-list')
+
+        response = self.client.get(url, {'page_size': 3})
+        self.assertEqual(
+            [group['name'] for group in response.data['results']],
+            ['Fourth Group', 'Third Group', 'Second Group']
+        )
+        self.assertIsNone(response.data['previous'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(
+            [group['name'] for group in response.data['results']],
+            ['First Group']
+        )
+        self.assertIsNone(response.data['next'])
+
+    def test_list_group_page_with_matching_etag_is_not_modified(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('esusugroup-list')
+        etag = self.client.get(url, {'page_size': 2})['ETag']
+
+        # groups off the page leave it be
+        group = EsusuGroup.objects.get(name='First Group')
+        group.name = 'Fifth Group'
+        group.save()
+        response = self.client.get(url, {'page_size': 2}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_list_group_page_is_modified_when_a_group_leaves_it(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('esusugroup-list')
+        etag = self.client.get(url, {'page_size': 2})['ETag']
+
+        EsusuGroup.objects.get(name='Third Group').delete()
+        response = self.client.get(url, {'page_size': 2}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [group['name'] for group in response.data['results']],
+            ['Fourth Group', 'Second Group']
+        )
 
     def test_unauthenticated_user_cannot_list_group(self):
         url = reverse('esusugroup-list')
@@ -153,6 +213,34 @@ class EsusuGroupDetailApiTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_retrieve_group_by_hash_id(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('esusugroup-detail', kwargs={'pk': self.group.hash_id})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['hash_id'], self.group.hash_id)
+
+    def test_retrieve_group_by_unknown_hash_id_is_not_found(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse('esusugroup-detail', kwargs={'pk': self.group.hash_id[::-1]})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_group_by_hash_id_made_of_digits(self):
+        other = EsusuGroup.objects.create(name='Sad Pockets', admin=self.user)
+        digits = str(self.group.pk).rjust(11, '9')
+        self.client.force_authenticate(user=self.user)
+        url = reverse('esusugroup-detail', kwargs={'pk': digits})
+
+        resolve = {digits: other.pk}.get
+        with mock.patch.object(EsusuGroup, 'get_pk_from_hash_id', resolve):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Sad Pockets')
+
     def test_unauthenticated_user_cannot_retrieve_group(self):
         url = reverse('esusugroup-detail', kwargs={'pk': self.group.pk})
         response = self.client.get(url)
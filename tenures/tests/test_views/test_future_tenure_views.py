@@ -172,7 +172,19 @@ class FutureTenureListAPITest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+
+    def test_list_ft_queries_do_not_grow_with_fts(self):
+        bryan = get_user_model().objects.create_user(
+            email='bryan@stclaire.com', password='passwordless',
+            first_name='Bryan', last_name='StClaire'
+        )
+        self.client.force_authenticate(bryan)
+
+        # the validators are read off the page:
+        # list future tenures along with their groups and admins
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
 
     def test_unauthenticated_user_cannot_list_ft(self):
         response = self.client.get(self.url)
@@ -187,7 +199,7 @@ class FutureTenureRetrieveAPITest(APITestCase):
 
     * User retrieves a single future tenure to possibly place a watch on it
 
-    GET  /api/future-tenures/<hash_id:pk>/
+    GET  /api/future-tenures/<int:pk>/
     '''
     def setUp(self):
         mfon = get_user_model().objects.create_user(
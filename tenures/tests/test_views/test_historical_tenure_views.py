@@ -1,10 +1,17 @@
+import csv
+import io
+import shutil
+import tempfile
+
 from django.contrib.auth import get_user_model
+from django.test import override_settings
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIRequestFactory
 
-from ...models import HistoricalTenure, EsusuGroup
+from ... import archive
+from ...models import Contribution, HistoricalTenure, EsusuGroup
 from ...serializers import HistoricalTenureSerializer
 
 
@@ -79,8 +86,87 @@ class HistoricalTenureListAPITest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+
+    def test_list_ht_queries_do_not_grow_with_hts(self):
+        self.client.force_authenticate(self.user)
+
+        # fetch group, list historical tenures along with their groups and admins
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
 
     def test_unauthenticated_user_cannot_list_ht(self):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class HistoricalTenureContributionsAPITest(APITestCase):
+    '''
+    * The contributions of dissolved tenures are archived out of the database
+    * Finance staff can still read the ledger of a historical tenure
+
+    GET  /api/historical-tenures/<int:pk>/contributions/
+    '''
+    def setUp(self):
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        settings_override = override_settings(CONTRIBUTION_ARCHIVE_DIR=archive_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        self.staff = get_user_model().objects.create_user(
+            email='finance@susu.com', password='ledgerbound',
+            first_name='Fin', last_name='Ance', is_staff=True
+        )
+        eg = EsusuGroup.objects.create(name='Lifelong Savers', admin=self.user)
+        self.ht = HistoricalTenure.objects.create(
+            amount=10000, esusu_group=eg,
+            live_at=timezone.now() - timezone.timedelta(365)
+        )
+        for _ in range(2):
+            Contribution.objects.create(amount=10000, historical_tenure=self.ht, user=self.user)
+        archive.archive_tenure_contributions(self.ht.pk)
+        # and one yet to be archived
+        Contribution.objects.create(amount=10000, historical_tenure=self.ht, user=self.user)
+
+        self.url = reverse('historicaltenure-contributions', kwargs={'pk': self.ht.pk})
+
+    def test_staff_can_read_archived_ledger(self):
+        self.client.force_authenticate(self.staff)
+
+        response = self.client.get(self.url)
+        content = b''.join(response.streaming_content).decode()
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({int(row['historical_tenure']) for row in rows}, {self.ht.pk})
+
+    def test_ledger_is_the_one_exported(self):
+        self.client.force_authenticate(self.staff)
+        Contribution.objects.create(
+            amount=10000, historical_tenure=self.ht, user=self.user
+        ).delete()
+
+        response = self.client.get(self.url)
+        export = self.client.get(
+            reverse('contribution-export'), {'historical_tenure': self.ht.pk}
+        )
+
+        content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content, b''.join(export.streaming_content).decode())
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertNotIn('deleted_at', rows[0])
+
+    def test_non_staff_cannot_read_archived_ledger(self):
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
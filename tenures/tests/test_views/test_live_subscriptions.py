@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from rest_framework.reverse import reverse
@@ -67,7 +69,29 @@ class LiveSubscriptionListAPITest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+
+    def test_list_ls_queries_do_not_grow_with_subscriptions(self):
+        self.client.force_authenticate(self.mfon)
+
+        # fetch group, list subscriptions along with their users
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_stream_ls_as_ndjson(self):
+        self.client.force_authenticate(self.mfon)
+
+        # fetch group, stream subscriptions along with their users
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'stream': 'ndjson'})
+            lines = b''.join(response.streaming_content).decode().splitlines()
+
+        serializer = LiveSubscriptionSerializer(
+            LiveSubscription.objects.filter(tenure=self.lt),
+            many=True,
+            context={'request': APIRequestFactory().get(self.url)}
+        )
+        self.assertEqual([json.loads(line) for line in lines], serializer.data)
 
     def test_unauthenticated_user_cannot_list_subscriptions(self):
         response = self.client.get(self.url)
@@ -1,4 +1,6 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIRequestFactory
@@ -53,7 +55,19 @@ class LiveTenureListAPITest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+
+    def test_list_lt_queries_do_not_grow_with_lts(self):
+        ambrose = get_user_model().objects.create_user(
+            email='ambrose@igibo.com', password='nopassword',
+            first_name='Ambrose', last_name='Igibo'
+        )
+        self.client.force_authenticate(ambrose)
+
+        # the validators are read off the page:
+        # list live tenures along with their groups and admins
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
 
     def test_unauthenticated_user_cannot_list_lt(self):
         response = self.client.get(self.url)
@@ -104,3 +118,72 @@ class LiveTenureRetrieveAPITest(APITestCase):
         response = self.client.get(self.url)
 
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'responses': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class LiveTenureCachedRetrieveAPITest(APITestCase):
+    '''
+    Retrieved live tenures are served from the response cache
+    until they, their groups or their admins change.
+    '''
+    def setUp(self):
+        self.mfon = get_user_model().objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        self.group = EsusuGroup.objects.create(
+            name='Lifelong Savers', admin=self.mfon
+        )
+        lt = LiveTenure.objects.create(amount=10000, esusu_group=self.group)
+
+        self.url = reverse('livetenure-detail', kwargs={'pk': lt.pk})
+        self.client.force_authenticate(self.mfon)
+
+    def tearDown(self):
+        caches['responses'].clear()
+
+    def test_retrieve_lt_is_cached(self):
+        response = self.client.get(self.url)
+
+        # only the validators are fetched
+        with self.assertNumQueries(1):
+            cached_response = self.client.get(self.url)
+
+        self.assertEqual(cached_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertEqual(cached_response['ETag'], response['ETag'])
+
+    def test_retrieve_lt_with_malformed_pk_is_not_found(self):
+        url = reverse('livetenure-detail', kwargs={'pk': 'abc'})
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_retrieve_lt_with_matching_etag_is_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_cached_lt_is_forgotten_when_its_group_changes(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.group.name = 'Lifelong Spenders'
+        self.group.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['group']['name'], 'Lifelong Spenders')
+
+    def test_retrieve_missing_lt(self):
+        response = self.client.get(reverse('livetenure-detail', kwargs={'pk': 0}))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -5,6 +5,7 @@ from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APITestCase, APIRequestFactory
 
+from ... import tasks
 from ...models import EsusuGroup, FutureTenure, Watch
 from ...serializers import WatchSerializer
 
@@ -54,6 +55,20 @@ class WatchCreateAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_create_watch_by_group_hash_id(self):
+        '''
+        Watchelina can watch Mfon's group off the hash id he shared.
+        '''
+        self.client.force_authenticate(self.watchelina)
+        response = self.client.post(
+            reverse('esusugroup-watch', kwargs={'pk': self.group.hash_id}),
+            data=json.dumps({}),
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(Watch.objects.filter(tenure=self.ft, user=self.watchelina).exists())
+
     def test_unauthenticated_user_cannot_create_watch(self):
         response = self.client.post(
             self.url,
@@ -162,7 +177,53 @@ class WatchListAPITest(APITestCase):
         )
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
+
+    def test_stream_watches(self):
+        '''
+        Mfon can have all watches on his group streamed as a json array.
+        '''
+        self.client.force_authenticate(self.mfon)
+        response = self.client.get(self.url, {'stream': 1})
+
+        serializer = WatchSerializer(
+            Watch.objects.filter(tenure__esusu_group=self.group),
+            many=True,
+            context={'request': APIRequestFactory().get(self.url)}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            json.loads(b''.join(response.streaming_content)),
+            json.loads(json.dumps(serializer.data))
+        )
+
+    def test_stream_watches_as_ndjson(self):
+        self.client.force_authenticate(self.mfon)
+        response = self.client.get(self.url, {'stream': 'ndjson'})
+
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(
+            {json.loads(line)['user_name'] for line in lines},
+            {str(self.mfon), str(self.watchelina), str(self.watchson)}
+        )
+
+    def test_cannot_stream_watches_if_not_admin_of_group(self):
+        self.client.force_authenticate(self.watchson)
+        response = self.client.get(self.url, {'stream': 1})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_list_watches_queries_do_not_grow_with_watches(self):
+        self.client.force_authenticate(self.mfon)
+
+        # fetch group, list watches along with their users
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
 
     def test_unauthenticated_user_cannot_list_watches(self):
         response = self.client.get(self.url)
@@ -270,6 +331,34 @@ class WatchRetrieveAPITest(APITestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_retrieve_watch_with_matching_etag_is_not_modified(self):
+        self.client.force_authenticate(self.watchelina)
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_watch_reset_in_bulk_is_modified(self):
+        self.client.force_authenticate(self.watchelina)
+        etag = self.client.get(self.url)['ETag']
+
+        tasks.reset_watches_on_updated_future_tenure(self.ww.tenure_id)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], Watch.TO_REVIEW_UPDATE)
+
+    def test_cannot_revalidate_someone_elses_watch(self):
+        '''
+        Mfon cannot find out that Watchelina's watch hasn't changed.
+        '''
+        self.client.force_authenticate(self.watchelina)
+        etag = self.client.get(self.url)['ETag']
+        self.client.force_authenticate(self.mfon)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
 
 class WatchUpdateAPITest(APITestCase):
     '''
@@ -11,6 +11,7 @@ router.register('live-tenures', views.LiveTenureViewSet, basename='livetenure')
 router.register('historical-tenures', views.HistoricalTenureViewSet, basename='historicaltenure')
 router.register('watches', views.WatchViewSet, basename='watch')
 router.register('live-subscriptions', views.LiveSubscriptionViewSet, basename='livesubscription')
+router.register('contributions', views.ContributionViewSet, basename='contribution')
 
 urlpatterns = [
     path('', include(router.urls)),
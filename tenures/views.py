@@ -5,7 +5,10 @@ from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
-from esusu import utils
+from esusu import streaming, utils
+from esusu.caching import CachedRetrieveMixin
+from esusu.conditional import ConditionalGetMixin, ConditionalListMixin, ConditionalRetrieveMixin
+from esusu.pagination import CursorPagination
 from .models import (
     EsusuGroup,
     FutureTenure, LiveTenure, HistoricalTenure,
@@ -16,16 +19,37 @@ from .serializers import (
     FutureTenureSerializer, LiveTenureSerializer, HistoricalTenureSerializer,
     WatchSerializer, LiveSubscriptionSerializer
 )
+from . import tasks
 from .permissions import IsGroupAdminOrReadOnly, IsGroupMember, IsOwner, IsGroupAdmin
 
 
-class EsusuGroupViewSet(viewsets.ModelViewSet):
-    queryset = EsusuGroup.objects.all()
+# tenures are served along with their groups and admins
+TENURE_VALIDATOR_FIELDS = (
+    'updated_at', 'esusu_group__updated_at', 'esusu_group__admin__updated_at'
+)
+
+
+class EsusuGroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = EsusuGroup.objects.select_related('admin')
     serializer_class = EsusuGroupSerializer
+    validator_fields = ('updated_at', 'admin__updated_at')
+    pagination_class = CursorPagination
     permission_classes = [
         permissions.IsAuthenticated, IsGroupAdminOrReadOnly,
     ]
 
+    def get_object(self):
+        '''
+        Look the group up by its pk, or by the hash id shared for it,
+        on its detail routes and their actions (such as `watch`).
+        '''
+        lookup = self.kwargs['pk']
+        # hashes are tried first, as they may well be made of digits only
+        pk = EsusuGroup.get_pk_from_hash_id(lookup)
+        if pk is not None:
+            self.kwargs['pk'] = pk
+        return super().get_object()
+
     def perform_create(self, serializer):
         serializer.save(admin=self.request.user)
 
@@ -59,7 +83,7 @@ class EsusuGroupViewSet(viewsets.ModelViewSet):
             return Response(serializer.data, status.HTTP_200_OK)
 
         elif request.method == 'PUT':
-            ft = get_object_or_404(FutureTenure, pk=group.hash_id)
+            ft = get_object_or_404(FutureTenure, esusu_group=group)
 
             serializer = FutureTenureSerializer(
                 instance=ft,
@@ -77,7 +101,7 @@ class EsusuGroupViewSet(viewsets.ModelViewSet):
             # perform a hard delete on the object
             # so that we don't wrestle with integrity errors
             # when a new one is created for same group
-            ft = get_object_or_404(FutureTenure, pk=group.hash_id)
+            ft = get_object_or_404(FutureTenure, esusu_group=group)
             ft.delete(hard=True)
             return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -90,12 +114,17 @@ class EsusuGroupViewSet(viewsets.ModelViewSet):
         List historical tenures from their respective groups.
         '''
         group = self.get_object()
+        page = self.paginate_queryset(
+            HistoricalTenure.objects.filter(
+                esusu_group=group
+            ).select_related('esusu_group__admin')
+        )
         serializer = HistoricalTenureSerializer(
-            HistoricalTenure.objects.filter(esusu_group=group),
+            page,
             many=True,
             context={'request': request}
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.get_paginated_response(serializer.data)
 
 
     @action(methods=['post', 'get'], detail=True,
@@ -126,16 +155,31 @@ class EsusuGroupViewSet(viewsets.ModelViewSet):
         elif request.method == 'GET':
             # List the watch objects on (the future tenure of) the esusu
             # group identified by this view if authenticated user is
-            # the admin of the so identified group
+            # the admin of the so identified group, streaming them all
+            # when asked to with `?stream=`
             if not group.admin == request.user:
                 return utils.make_generic_403_response()
 
+            watches = Watch.objects.filter(
+                tenure__esusu_group=group
+            ).select_related('user')
+
+            stream_format = streaming.get_stream_format(request)
+            if stream_format:
+                return streaming.make_streaming_response(
+                    streaming.iter_serialized(
+                        watches, WatchSerializer, {'request': request}
+                    ),
+                    stream_format
+                )
+
+            page = self.paginate_queryset(watches)
             serializer = WatchSerializer(
-                Watch.objects.filter(tenure__esusu_group=group),
+                page,
                 many=True,
                 context={'request': request}
             )
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            return self.get_paginated_response(serializer.data)
 
 
     @action(methods=['get'], detail=True,
@@ -143,51 +187,123 @@ class EsusuGroupViewSet(viewsets.ModelViewSet):
             permission_classes=[permissions.IsAuthenticated, IsGroupAdmin])
     def live_subscription(self, request, pk=None):
         '''
-        List live subscriptions from their respective groups.
+        List live subscriptions from their respective groups,
+        or stream them all when asked to with `?stream=`.
         '''
         group = self.get_object()
 
+        subscriptions = LiveSubscription.objects.filter(
+            tenure__esusu_group=group
+        ).select_related('user')
+
+        stream_format = streaming.get_stream_format(request)
+        if stream_format:
+            return streaming.make_streaming_response(
+                streaming.iter_serialized(
+                    subscriptions, LiveSubscriptionSerializer, {'request': request}
+                ),
+                stream_format
+            )
+
+        page = self.paginate_queryset(subscriptions)
         serializer = LiveSubscriptionSerializer(
-            LiveSubscription.objects.filter(tenure__esusu_group=group),
+            page,
             many=True,
             context={'request': request}
         )
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.get_paginated_response(serializer.data)
 
 
-class FutureTenureViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = FutureTenure.objects.all()
+class FutureTenureViewSet(CachedRetrieveMixin,
+                          ConditionalListMixin,
+                          viewsets.ReadOnlyModelViewSet
+                         ):
+    queryset = FutureTenure.objects.select_related('esusu_group__admin')
     serializer_class = FutureTenureSerializer
+    validator_fields = TENURE_VALIDATOR_FIELDS
+    pagination_class = CursorPagination
 
 
-class LiveTenureViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = LiveTenure.objects.all()
+class LiveTenureViewSet(CachedRetrieveMixin,
+                        ConditionalListMixin,
+                        viewsets.ReadOnlyModelViewSet
+                       ):
+    queryset = LiveTenure.objects.select_related('esusu_group__admin')
     serializer_class = LiveTenureSerializer
+    validator_fields = TENURE_VALIDATOR_FIELDS
+    pagination_class = CursorPagination
 
 
-class HistoricalTenureViewSet(mixins.RetrieveModelMixin,
+class HistoricalTenureViewSet(CachedRetrieveMixin,
+                              mixins.RetrieveModelMixin,
                               viewsets.GenericViewSet
                              ):
-    queryset = HistoricalTenure.objects.all()
+    queryset = HistoricalTenure.objects.select_related('esusu_group__admin')
     serializer_class = HistoricalTenureSerializer
+    validator_fields = TENURE_VALIDATOR_FIELDS
+
+    @action(methods=['get'], detail=True,
+            permission_classes=[permissions.IsAdminUser])
+    def contributions(self, request, pk=None):
+        '''
+        Stream the ledger of contributions to the historical tenure, as
+        csv (or as `?stream=` asks), archived contributions included.
+        '''
+        ht = self.get_object()
+        return streaming.make_streaming_response(
+            tasks.iter_contribution_ledger(historical_tenure_pk=ht.pk),
+            streaming.get_stream_format(request, default='csv'),
+            filename='contributions-{}'.format(ht.pk)
+        )
 
 
-class WatchViewSet(mixins.RetrieveModelMixin,
+class WatchViewSet(ConditionalRetrieveMixin,
+                   mixins.RetrieveModelMixin,
                    mixins.UpdateModelMixin,
                    mixins.DestroyModelMixin,
                    viewsets.GenericViewSet
                   ):
-    queryset = Watch.objects.all()
+    queryset = Watch.objects.select_related('user')
     serializer_class = WatchSerializer
+    validator_fields = ('updated_at', 'user__updated_at')
     permission_classes = [permissions.IsAuthenticated, IsOwner]
 
     def perform_destroy(self, instance):
         instance.delete(hard=True)
 
 
-class LiveSubscriptionViewSet(mixins.RetrieveModelMixin,
+class LiveSubscriptionViewSet(ConditionalRetrieveMixin,
+                              mixins.RetrieveModelMixin,
                               viewsets.GenericViewSet
                               ):
-    queryset = LiveSubscription.objects.all()
+    queryset = LiveSubscription.objects.select_related('user')
     serializer_class = LiveSubscriptionSerializer
+    validator_fields = ('updated_at', 'user__updated_at')
     permission_classes = [permissions.IsAuthenticated, IsOwner]
+
+
+class ContributionViewSet(viewsets.GenericViewSet):
+    permission_classes = [permissions.IsAdminUser]
+
+    @action(methods=['get'], detail=False)
+    def export(self, request):
+        '''
+        Stream the ledger of contributions, optionally narrowed down to
+        a (live) `?tenure=`, a `?historical_tenure=` and/or a `?user=`,
+        as csv (or as `?stream=` asks). Archived contributions are only
+        exported per historical tenure or per user.
+        '''
+        try:
+            filters = {
+                '{}_pk'.format(name): int(request.query_params[name])
+                for name in ('tenure', 'historical_tenure', 'user')
+                if name in request.query_params
+            }
+        except ValueError:
+            return utils.make_generic_400_response()
+
+        return streaming.make_streaming_response(
+            tasks.iter_contribution_ledger(**filters),
+            streaming.get_stream_format(request, default='csv'),
+            filename='contributions'
+        )
@@ -100,6 +100,53 @@ class RetrieveUserAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
 
 
+class ConditionalGetUserAPITest(APITestCase):
+    '''
+    Users are served with validators, and clients holding
+    fresh validators are told that nothing has changed.
+    '''
+    def setUp(self):
+        self.mfon = User.objects.create_user(
+            email='mfon@etimfon.com', password='4g8menut!',
+            first_name='Mfon', last_name='Eti-mfon'
+        )
+        self.ambrose = User.objects.create_user(
+            email='ambrose@igibo.com', password='nopassword',
+            first_name='Ambrose', last_name='Igibo'
+        )
+        self.client.force_authenticate(self.mfon)
+
+    def test_list_users_with_matching_etag_is_not_modified(self):
+        url = reverse('user-list')
+        etag = self.client.get(url)['ETag']
+
+        # only the validators are aggregated
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_list_users_is_modified_when_a_user_changes(self):
+        url = reverse('user-list')
+        etag = self.client.get(url)['ETag']
+
+        self.ambrose.first_name = 'Ambrosia'
+        self.ambrose.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_retrieve_user_not_modified_since_last_modified(self):
+        url = reverse('user-detail', kwargs={'pk': self.ambrose.pk})
+        last_modified = self.client.get(url)['Last-Modified']
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
 class UnallowedActionsUserAPITest(APITestCase):
     '''
     create, update and delete actions are not allowed from this endpoint.
@@ -1,9 +1,10 @@
 from rest_framework import viewsets, mixins
 
+from esusu.conditional import ConditionalGetMixin
 from .models import User
 from .serializers import UserSerializer
 
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = UserSerializer
     queryset = User.objects.all()